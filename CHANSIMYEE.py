@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import simpledialog, messagebox, ttk
 import json
 import os
+from bisect import bisect_left
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
@@ -14,14 +16,44 @@ DEFAULT_GRADE_TO_GPA = {
 }
 
 # Local JSON files for storing GPA records and grade settings
+# Records live in RECORDS_DIR: manifest.json maps id -> {name, gpa, credits per grade} and each record's
+# courses are in their own <id>.json, read only when the record is opened.
+# DATA_FILE is the single-file layout of older versions, migrated on first load.
 DATA_FILE = "gpa_records.json"
+RECORDS_DIR = "gpa_records"
+MANIFEST_FILE = os.path.join(RECORDS_DIR, "manifest.json")
 SETTINGS_FILE = "gpa_settings.json"
 
-# Load saved GPA records from JSON file
+# Write JSON through a temp file so a crash never leaves a half-written file
+def write_json_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+def course_file(key):
+    return os.path.join(RECORDS_DIR, f"{key}.json")
+
+# Split the old single JSON file into the manifest and one file per record
+def migrate_records():
+    with open(DATA_FILE, 'r') as f:
+        data = json.load(f)
+    os.makedirs(RECORDS_DIR, exist_ok=True)
+    manifest = {}
+    for key, value in data.items():
+        write_json_atomic(course_file(key), {'courses': value.get('courses', [])})
+        manifest[key] = {'name': value['name'], 'gpa': value.get('gpa', 0.0),
+                         'credits': grade_credits(value.get('courses', []))}
+    write_json_atomic(MANIFEST_FILE, manifest)
+    os.replace(DATA_FILE, DATA_FILE + ".bak")
+
+# Load the record manifest (id -> name and GPA); courses are loaded per record
 def load_records():
     try:
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, 'r') as f:
+        if not os.path.exists(MANIFEST_FILE) and os.path.exists(DATA_FILE):
+            migrate_records()
+        if os.path.exists(MANIFEST_FILE):
+            with open(MANIFEST_FILE, 'r') as f:
                 return json.load(f)
         return {}
     except (FileNotFoundError, json.JSONDecodeError):
@@ -30,14 +62,109 @@ def load_records():
         messagebox.showerror("Error", f"Failed to load records: {e}")
         return {}
 
-# Save GPA records to JSON file
+# Save the record manifest
 def save_records(data):
     try:
-        with open(DATA_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
+        os.makedirs(RECORDS_DIR, exist_ok=True)
+        write_json_atomic(MANIFEST_FILE, data)
     except Exception as e:
         messagebox.showerror("Error", f"Failed to save records: {e}")
 
+# Load the course list of one record
+def load_courses(key):
+    try:
+        with open(course_file(key), 'r') as f:
+            return json.load(f)['courses']
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return []
+
+# Save the course list of one record
+def save_courses(key, courses):
+    try:
+        os.makedirs(RECORDS_DIR, exist_ok=True)
+        write_json_atomic(course_file(key), {'courses': courses})
+    except Exception as e:
+        messagebox.showerror("Error", f"Failed to save records: {e}")
+
+# Total credit hours per grade: all a GPA needs, so GPAs can be redone without the course files
+def grade_credits(courses):
+    credits = {}
+    for grade, credit in courses:
+        credits[grade] = credits.get(grade, 0) + credit
+    return credits
+
+# GPA of one course list, the way the calculator window works it out
+def calculate_gpa(courses, grade_to_gpa):
+    total_points = sum(grade_to_gpa[grade] * credit for grade, credit in courses)
+    total_credits = sum(credit for grade, credit in courses)
+    return total_points / total_credits
+
+# Fill in credits for manifest entries written before they were kept (reads those
+# records' course files once). Returns how many entries were filled in.
+def backfill_credits(records):
+    filled = 0
+    for key, value in records.items():
+        if 'credits' not in value:
+            value['credits'] = grade_credits(load_courses(key))
+            filled += 1
+    return filled
+
+# Credit hours of every record as a records x grades matrix, with grades encoded as
+# column indices once. It is built at load and patched as records change, so a
+# scale change is only (credits @ values) / (credits @ counted). Grades missing
+# from the scale are not counted, as in the chart.
+class CreditMatrix:
+    def __init__(self, records):
+        self.keys = list(records)                        # row -> record key
+        self.row_of = {key: row for row, key in enumerate(self.keys)}
+        self.grades = sorted({g for value in records.values() for g in value['credits']})  # column -> grade
+        self.column = {g: i for i, g in enumerate(self.grades)}
+        self.matrix = np.zeros((len(self.keys), len(self.grades)))
+        for row, key in enumerate(self.keys):
+            for grade, credit in records[key]['credits'].items():
+                self.matrix[row, self.column[grade]] = credit
+
+    def set(self, key, credits):
+        # Add or replace one record's row; a grade not seen before gets a new column
+        for grade in credits:
+            if grade not in self.column:
+                self.column[grade] = len(self.grades)
+                self.grades.append(grade)
+                self.matrix = np.hstack([self.matrix, np.zeros((len(self.keys), 1))])
+        if key not in self.row_of:
+            self.row_of[key] = len(self.keys)
+            self.keys.append(key)
+            self.matrix = np.vstack([self.matrix, np.zeros((1, len(self.grades)))])
+        row = self.row_of[key]
+        self.matrix[row] = 0
+        for grade, credit in credits.items():
+            self.matrix[row, self.column[grade]] = credit
+
+    def remove(self, key):
+        # The last row moves into the freed one
+        row = self.row_of.pop(key, None)
+        if row is None:
+            return
+        last = self.keys.pop()
+        if last != key:
+            self.keys[row] = last
+            self.row_of[last] = row
+            self.matrix[row] = self.matrix[-1]
+        self.matrix = self.matrix[:-1]
+
+    def gpas(self, grade_to_gpa):
+        # {key: GPA} under a grade scale
+        values = np.array([grade_to_gpa.get(g, 0.0) for g in self.grades])
+        counted = np.array([1.0 if g in grade_to_gpa else 0.0 for g in self.grades])
+        points = self.matrix @ values
+        hours = self.matrix @ counted
+        gpas = np.divide(points, hours, out=np.zeros_like(points), where=hours > 0)
+        return dict(zip(self.keys, gpas.tolist()))
+
+def delete_courses(key):
+    if os.path.exists(course_file(key)):
+        os.remove(course_file(key))
+
 # Load grade-to-GPA settings from JSON file
 def load_grade_settings():
     try:
@@ -243,7 +370,17 @@ class GPAApp:
         self.root.title("GPA Records")
         self.records = load_records()  
         self.grade_to_gpa = load_grade_settings()  
+        # Old manifests get their credits filled in (and saved) once
+        if backfill_credits(self.records):
+            save_records(self.records)
+        self.credit_matrix = CreditMatrix(self.records)
         self.calculators = {}  # Dictionary to keep track of open GPA calculator windows
+        # Record ids in display order, kept sorted as records are added and deleted
+        self.record_ids = sorted(int(k) for k in self.records)
+        # Only the rows in view exist as widgets; they are reused as the list scrolls
+        self.row_pool = []
+        self.row_height = 1
+        self.scroll_region = None  # last scrollregion set; only changed when it differs
         self.build_main_ui()  
 
     def get_records(self):
@@ -251,7 +388,15 @@ class GPAApp:
 
     def set_records(self, new_records):
         if isinstance(new_records, dict):
+            # Course lists go to their own files, the manifest keeps name and GPA
+            for key, value in new_records.items():
+                if 'courses' in value:
+                    value['credits'] = grade_credits(value['courses'])
+                    save_courses(key, value.pop('courses'))
+            backfill_credits(new_records)
             self.records = new_records
+            self.record_ids = sorted(int(k) for k in self.records)
+            self.credit_matrix = CreditMatrix(self.records)
             self.save_and_refresh()
         else:
             messagebox.showerror("Error", "Records must be a dictionary")
@@ -262,6 +407,7 @@ class GPAApp:
     def set_grade_to_gpa(self, new_scale):
         if isinstance(new_scale, dict):
             self.grade_to_gpa = new_scale
+            self.recompute_all_gpas()
             for calc in self.calculators.values():
                 calc.grade_to_gpa = new_scale
                 calc.refresh_grade_options()
@@ -287,20 +433,21 @@ class GPAApp:
         container = tk.Frame(self.root)
         container.pack(fill="both", expand=True, padx=10, pady=5)
 
-        canvas = tk.Canvas(container)
-        scrollbar = tk.Scrollbar(container, orient="vertical", command=canvas.yview)
-        self.records_frame = tk.Frame(canvas)
+        self.records_canvas = tk.Canvas(container)
+        self.records_scrollbar = tk.Scrollbar(container, orient="vertical", command=self.records_canvas.yview)
 
-        # Update scroll region when records frame changes
-        self.records_frame.bind(
-            "<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
+        self.records_canvas.pack(side="left", fill="both", expand=True)
+        self.records_scrollbar.pack(side="right", fill="y")
 
-        canvas.create_window((0, 0), window=self.records_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+        # Measure one row up front, before any repaint can run: the repaint path
+        # must not wait on Tk geometry
+        self.row_pool.append(self.make_record_row())
+        self.row_pool[0]['frame'].update_idletasks()
+        self.row_height = max(1, self.row_pool[0]['frame'].winfo_reqheight())
 
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        # Rows are repainted whenever the view moves or the canvas is resized
+        self.records_canvas.configure(yscrollcommand=self.on_records_scroll)
+        self.records_canvas.bind("<Configure>", lambda e: self.display_records())
 
         # Display all saved GPA records in the scrollable frame
         self.display_records()
@@ -310,6 +457,8 @@ class GPAApp:
         # When user saves settings, update the grade scale in app and refresh all open calculator windows
         def on_settings_saved(new_grade_to_gpa):
             self.grade_to_gpa = new_grade_to_gpa
+            # Stored GPAs were worked out under the old scale
+            self.recompute_all_gpas()
             # Refresh all open calculator windows with new grade scale
             for calc in self.calculators.values():
                 calc.grade_to_gpa = new_grade_to_gpa
@@ -318,20 +467,57 @@ class GPAApp:
         
         GradeSettingsWindow(self.root, self.grade_to_gpa, on_settings_saved)
 
+    def make_record_row(self):
+        # One reusable row: label and action buttons act on whichever record the row shows
+        row = {'key': None, 'text': None, 'position': None}
+        frame = row['frame'] = tk.Frame(self.records_canvas)
+        row['label'] = tk.Label(frame, width=30, anchor="w")
+        row['label'].grid(row=0, column=0)
+        tk.Button(frame, text="Open", width=8, command=lambda: self.open_calculator(row['key'])).grid(row=0, column=1, padx=5, pady=3)
+        tk.Button(frame, text="Rename", width=8, command=lambda: self.rename_record(row['key'])).grid(row=0, column=2, padx=5, pady=3)
+        tk.Button(frame, text="Delete", width=8, command=lambda: self.delete_record(row['key'])).grid(row=0, column=3, padx=5, pady=3)
+        row['window'] = self.records_canvas.create_window(0, 0, window=frame, anchor="nw", state="hidden")
+        return row
+
+    def on_records_scroll(self, first, last):
+        self.records_scrollbar.set(first, last)
+        self.display_records()
+
     def display_records(self):
-        # Clear old record widgets before redisplaying
-        for widget in self.records_frame.winfo_children():
-            widget.destroy()
-
-        # Display each saved GPA record
-        for idx, (key, value) in enumerate(sorted(self.records.items(), key=lambda x: int(x[0]))):
-            name = value['name']
-            gpa = value['gpa']
-            # Show record information and action buttons
-            tk.Label(self.records_frame, text=f"{key}. {name} (GPA: {gpa:.2f})", width=30, anchor="w").grid(row=idx, column=0)
-            tk.Button(self.records_frame, text="Open", width=8, command=lambda k=key: self.open_calculator(k)).grid(row=idx, column=1, padx=5, pady=3)
-            tk.Button(self.records_frame, text="Rename", width=8, command=lambda k=key: self.rename_record(k)).grid(row=idx, column=2, padx=5, pady=3)
-            tk.Button(self.records_frame, text="Delete", width=8, command=lambda k=key: self.delete_record(k)).grid(row=idx, column=3, padx=5, pady=3)
+        # Show the records in view, patching only rows whose record or text changed
+        canvas = self.records_canvas
+        total = len(self.record_ids)
+        # Setting scrollregion makes the canvas call yscrollcommand (and so this
+        # method) again, so only touch it when it really changes
+        region = (0, 0, canvas.winfo_width(), total * self.row_height)
+        if region != self.scroll_region:
+            canvas.configure(scrollregion=region)
+            self.scroll_region = region
+        top = int(canvas.canvasy(0)) // self.row_height
+        needed = canvas.winfo_height() // self.row_height + 2
+        while len(self.row_pool) < needed:
+            self.row_pool.append(self.make_record_row())
+
+        for i, row in enumerate(self.row_pool):
+            idx = top + i
+            if idx >= total:
+                if row['key'] is not None:
+                    canvas.itemconfigure(row['window'], state="hidden")
+                    row['key'] = row['position'] = None
+                continue
+            key = str(self.record_ids[idx])
+            value = self.records[key]
+            text = f"{key}. {value['name']} (GPA: {value['gpa']:.2f})"
+            if row['text'] != text:
+                row['label'].config(text=text)
+                row['text'] = text
+            # Position key includes the row height, so a row placed before it was known still moves
+            if row['position'] != (idx, self.row_height):
+                canvas.coords(row['window'], 0, idx * self.row_height)
+                row['position'] = (idx, self.row_height)
+            if row['key'] is None:
+                canvas.itemconfigure(row['window'], state="normal")
+            row['key'] = key
 
     def new_record(self):
         # Create a new record with the next available ID
@@ -342,7 +528,9 @@ class GPAApp:
         # Open a calculator window for the given record
         if key in self.calculators:
             return
-        self.calculators[key] = CalculatorWindow(self, key, is_new=is_new)
+        # Course data is only read from disk when a record is opened
+        courses = [] if is_new else load_courses(key)
+        self.calculators[key] = CalculatorWindow(self, key, courses, is_new=is_new)
 
     def close_calculator(self, key):
         # Close and remove a calculator window
@@ -361,16 +549,35 @@ class GPAApp:
         # Confirm and delete the selected record
         if messagebox.askyesno("Delete", f"Are you sure to delete record '{self.records[key]['name']}'?"):
             self.records.pop(key)
+            del self.record_ids[bisect_left(self.record_ids, int(key))]
+            self.credit_matrix.remove(key)
             self.close_calculator(key)
+            delete_courses(key)
             self.save_and_refresh()
 
     def update_record(self, key, courses, gpa):
         # Update courses and GPA for the record
+        pos = bisect_left(self.record_ids, int(key))
+        if pos == len(self.record_ids) or self.record_ids[pos] != int(key):
+            self.record_ids.insert(pos, int(key))
         self.records[key] = self.records.get(key, {'name': f"Record {key}"})
-        self.records[key]['courses'] = courses
         self.records[key]['gpa'] = gpa
+        self.records[key]['credits'] = grade_credits(courses)
+        self.credit_matrix.set(key, self.records[key]['credits'])
+        # Only this record's course file is rewritten
+        save_courses(key, courses)
         self.save_and_refresh()
 
+    def recompute_all_gpas(self):
+        # Two matrix products for every record, then one manifest write if any GPA moved
+        changed = 0
+        for key, gpa in self.credit_matrix.gpas(self.grade_to_gpa).items():
+            if abs(self.records[key].get('gpa', 0.0) - gpa) > 1e-9:
+                self.records[key]['gpa'] = gpa
+                changed += 1
+        if changed:
+            self.save_and_refresh()
+
     def save_and_refresh(self):
         # Save records to file and refresh the list display
         save_records(self.records)
@@ -378,16 +585,17 @@ class GPAApp:
 
 # GPA Calculator Window
 class CalculatorWindow(BaseWindow):
-    def __init__(self, app, key, is_new=False):
+    def __init__(self, app, key, courses=None, is_new=False):
         super().__init__()
         self.app = app
         self.key = key
         self.is_new = is_new
         self.grade_to_gpa = app.grade_to_gpa  # Use application's grade-to-GPA settings
+        self.courses = courses or []  # loaded by GPAApp.open_calculator
 
         # Load record data (create a new one if not exists)
         if key not in self.app.records:
-            self.data = {'name': f"Record {key}", 'courses': [], 'gpa': 0.0}
+            self.data = {'name': f"Record {key}", 'gpa': 0.0}
         else:
             self.data = self.app.records[key]
 
@@ -422,7 +630,7 @@ class CalculatorWindow(BaseWindow):
         tk.Label(self.entry_frame, text="Credit Hours", width=25, font=("Arial", 10, "bold")).grid(row=0, column=1, padx=5, pady=(5, 2))
 
         # Load existing courses or default one row
-        for i, (grade, credit) in enumerate(self.data.get('courses', []), start=1):
+        for i, (grade, credit) in enumerate(self.courses, start=1):
             self.add_row(grade, credit)
 
         if not self.entries:
@@ -491,8 +699,6 @@ class CalculatorWindow(BaseWindow):
     
     # Save all course data, validate inputs, and calculate GPA
     def save_and_calc(self):
-        total_points = 0
-        total_credits = 0
         courses = []
 
         for grade_combobox, credit_entry in self.entries:
@@ -520,21 +726,20 @@ class CalculatorWindow(BaseWindow):
                 self.show_error(f"Invalid credit hours: {credit}\nPlease enter a valid number.")
                 return
 
-            total_points += self.grade_to_gpa[grade] * credit
-            total_credits += credit
             courses.append((grade, credit))
 
-        if total_credits == 0:
+        if not courses:
             self.show_error("Please enter at least one course with valid credit hours.")
             return
 
-        gpa = total_points / total_credits
+        gpa = calculate_gpa(courses, self.grade_to_gpa)
 
         # Initialize record on first save
         if self.is_new:
-            self.app.records[self.key] = {'name': self.data['name'], 'courses': [], 'gpa': 0.0}
+            self.app.records[self.key] = {'name': self.data['name'], 'gpa': 0.0}
             self.is_new = False
 
+        self.courses = courses
         self.app.update_record(self.key, courses, gpa)
         self.update_gpa_display()
 
@@ -544,7 +749,7 @@ class CalculatorWindow(BaseWindow):
         self.result_label.config(text=f"Your GPA is: {gpa:.2f}", fg=color)
 
     def show_chart(self):
-        all_courses = self.app.records.get(self.key, {}).get('courses', [])
+        all_courses = self.courses
         valid_courses = [(g, c) for g, c in all_courses if g in self.grade_to_gpa and isinstance(c, (int, float))]
         if not valid_courses:
             self.show_error("No valid courses with valid credit hours to show chart.")
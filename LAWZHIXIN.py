@@ -1,20 +1,34 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import asyncio
+import heapq
+import math
+import socket
+import tempfile
 import threading
 import time
-from datetime import datetime
+from datetime import datetime, date, timedelta
 import json
 import os
 
 
 class Timer:
 #Initialization(Variables/Constructors)
-    def __init__(self):
+#scheduler is anything with after(ms, func)/after_cancel(id), e.g. the Tk root or
+#the shared TimerService, so the countdown runs on an event loop instead of its own thread
+    def __init__(self, scheduler=None):
         self.CurrentTime =0
         self.OriginalTime =0
         self.isRunning = False
-        self.TimerThread = None
         self.StartTime = None
+        self.Scheduler = scheduler
+        self.Resolution = 0.1   #seconds between ticks
+        self.Deadline = None    #time.monotonic() when the countdown reaches 0
+        self.RunId = 0          #bumped on every start/pause/reset so old callbacks stop
+        self.AfterId = None
+        self.ExpectedAt = None  #time.monotonic() the next tick is due
+        self.Lock = threading.RLock()  #the scheduler may call RunTimer from another thread
+        self.ResetStats()
 
 #GETTER and SETTER
         
@@ -34,97 +48,743 @@ class Timer:
         self.OriginalTime = value
 
             
-#The Format Of Time like 00:00
+#The Format Of Time like 00:00 (partial seconds round up, so 24:59.5 shows 25:00)
     def FormatTime(self, seconds):
-        mins, secs = divmod(seconds, 60)
+        mins, secs = divmod(math.ceil(seconds), 60)
         return f"{int(mins):02d}:{int(secs):02d}"
 
 #Set Time（Set the time to countdown)
     def SetTime(self, seconds):
         self.CurrentTime = seconds
         self.OriginalTime = seconds
+        self.ResetStats()
 
 #Start Time(Start the countdown)
     def Start(self):
-        if not self.isRunning and self.CurrentTime > 0:
-            self.isRunning = True
-            self.StartTime = datetime.now()
-            self.TimerThread = threading.Thread(target=self.RunTimer)
-            self.TimerThread.daemon = True
-            self.TimerThread.start()
+        with self.Lock:
+            if not self.isRunning and self.CurrentTime > 0:
+                if self.Scheduler is None:
+                    raise RuntimeError("Timer needs a scheduler with after()/after_cancel(), e.g. the Tk root")
+                self.isRunning = True
+                self.StartTime = datetime.now()
+                #Remaining time is always worked out from this deadline, so late ticks never add up
+                self.Deadline = time.monotonic() + self.CurrentTime
+                self.RunId += 1
+                self.Schedule(self.RunId, 0)
 
 #Stop Time(Pause countdown function)
     def Pause(self):
-        if self.isRunning:
-            self.isRunning = False
+        with self.Lock:
+            if self.isRunning:
+                self.CurrentTime = max(0.0, self.Deadline - time.monotonic())
+                self.Stop()
 
 #Reset Time(Reset the countdown to original time--25:00--)
     def Reset(self):
-        self.isRunning = False
-        self.CurrentTime = self.OriginalTime
+        with self.Lock:
+            self.Stop()
+            self.CurrentTime = self.OriginalTime
 
-#Run Timer(The countdown function)
-    def RunTimer(self):
-        while self.isRunning and self.CurrentTime > 0:
-            time.sleep(1)
-            #stop 1 seconds deducte 1 CurrentTime
-            if self.isRunning:
-                self.CurrentTime -= 1
-                #show the GUI of the Timer immediately
-                self.OnTick()
-        #If the time is countdown to 0, call the OnTimerFinished function
-        if self.CurrentTime == 0 and self.isRunning:
+#Cancel the pending tick and make any callback already queued do nothing
+    def Stop(self):
+        with self.Lock:
+            self.isRunning = False
+            self.RunId += 1
+            if self.AfterId is not None:
+                self.Scheduler.after_cancel(self.AfterId)
+                self.AfterId = None
+
+    def Schedule(self, runId, delay):
+        #after() takes whole milliseconds: round up so a tick is never early
+        delayMs = math.ceil(delay * 1000)
+        self.ExpectedAt = time.monotonic() + delayMs / 1000
+        self.AfterId = self.Scheduler.after(delayMs, lambda: self.RunTimer(runId))
+
+#Run Timer(The countdown function, one call per tick)
+    def RunTimer(self, runId):
+        with self.Lock:
+            try:
+                self.Tick(runId)
+            except Exception as e:
+                #A failing tick stops this timer only; the owner decides how to report it
+                self.Stop()
+                self.OnError(e)
+
+    def Tick(self, runId):
+        if runId != self.RunId or not self.isRunning:
+            return
+        now = time.monotonic()
+        self.AfterId = None
+        self.RecordLateness(now - self.ExpectedAt)
+        remaining = self.Deadline - now
+        if remaining <= 0:
+            #How late the finish fired compared with the deadline
+            self.FinishDrift = -remaining
+            self.CurrentTime = 0
+            self.Stop()
             self.OnTimerFinished()
+            return
+        self.CurrentTime = remaining
+        #show the GUI of the Timer immediately
+        self.OnTick()
+        #Next tick lands just after the next Resolution boundary of the remaining time
+        delay = remaining % self.Resolution
+        if delay < 0.005:
+            delay += self.Resolution
+        self.Schedule(runId, delay)
+
+#Drift/jitter statistics: how late each tick ran compared with when it was due
+    def ResetStats(self):
+        self.TickCount = 0
+        self.LateSum = 0.0
+        self.LateSquares = 0.0
+        self.LateMax = 0.0
+        self.FinishDrift = None
 
-#Do nothing because OnTick And On TimerFinished mean it would nothing happen in here
+    def RecordLateness(self, late):
+        self.TickCount += 1
+        self.LateSum += late
+        self.LateSquares += late * late
+        self.LateMax = max(self.LateMax, late)
+
+    def GetStats(self):
+        #milliseconds; jitter is the standard deviation of the lateness
+        if self.TickCount == 0:
+            return {'ticks': 0, 'meanLateMs': 0.0, 'maxLateMs': 0.0, 'jitterMs': 0.0, 'finishDriftMs': None}
+        mean = self.LateSum / self.TickCount
+        variance = max(0.0, self.LateSquares / self.TickCount - mean * mean)
+        return {
+            'ticks': self.TickCount,
+            'meanLateMs': mean * 1000,
+            'maxLateMs': self.LateMax * 1000,
+            'jitterMs': math.sqrt(variance) * 1000,
+            'finishDriftMs': None if self.FinishDrift is None else self.FinishDrift * 1000,
+        }
+
+#Do nothing because OnTick, OnTimerFinished and OnError mean it would nothing happen in here
     def OnTick(self):
         pass
     def OnTimerFinished(self):
         pass
+    def OnError(self, error):
+        pass
+
+#=================================================================================================
+#Event channel from the timer engine to the GUI, safe to post to from any thread
+#Ticks are coalesced (only the newest is kept); other events are kept in order
+class TimerEvents:
+    def __init__(self):
+        self.Lock = threading.Lock()
+        self.LatestTick = None
+        self.Events = []
+
+    def PostTick(self, state):
+        with self.Lock:
+            self.LatestTick = state
+
+    def PostEvent(self, kind, data=None):
+        with self.Lock:
+            self.Events.append((kind, data))
+
+#Take everything posted since the last call: (latest tick or None, [(kind, data), ...])
+    def Drain(self):
+        with self.Lock:
+            tick, events = self.LatestTick, self.Events
+            self.LatestTick = None
+            self.Events = []
+        return tick, events
+
+#=================================================================================================
+#One asyncio loop, on one thread, that runs every timer in the process
+#Timers use it like Tk's after(): each pending tick is an entry in a single heap
+#ordered by deadline, so thousands of timers cost one thread and one wakeup at a time
+#Registered timers can also be listed and controlled through a local Unix socket
+#(one JSON object per line), e.g. {"cmd": "list"} or {"cmd": "start", "id": 3}
+class TimerService:
+    SharedService = None
+
+    @classmethod
+    def Shared(cls):
+        if cls.SharedService is None:
+            cls.SharedService = cls()
+            cls.SharedService.Serve()
+        return cls.SharedService
+
+    def __init__(self, socketPath=None):
+        self.Lock = threading.Lock()
+        self.Heap = []           #(deadline, id, func)
+        self.Cancelled = set()   #ids cancelled while still in the heap
+        self.NextId = 0
+        self.Timers = {}         #timer id -> (name, Timer) for the socket API
+        self.NextTimerId = 0
+        self.SocketPath = socketPath or self.DefaultSocketPath()
+        self.Loop = asyncio.new_event_loop()
+        self.Wakeup = None       #asyncio.Event, created on the loop
+        self.Ready = threading.Event()
+        threading.Thread(target=self.RunLoop, daemon=True).start()
+        self.Ready.wait()
+
+#One socket per user: the per-user runtime dir when there is one, else the temp dir with the uid
+    @staticmethod
+    def DefaultSocketPath():
+        runtime = os.environ.get('XDG_RUNTIME_DIR')
+        if runtime and os.path.isdir(runtime):
+            return os.path.join(runtime, "pomodoro-timers.sock")
+        uid = os.getuid() if hasattr(os, 'getuid') else 0
+        return os.path.join(tempfile.gettempdir(), f"pomodoro-timers-{uid}.sock")
+
+    def RunLoop(self):
+        asyncio.set_event_loop(self.Loop)
+        self.Loop.run_until_complete(self.Dispatch())
+
+#Scheduler interface (same as Tk's), safe to call from any thread
+    def after(self, ms, func):
+        deadline = time.monotonic() + ms / 1000
+        with self.Lock:
+            self.NextId += 1
+            heapq.heappush(self.Heap, (deadline, self.NextId, func))
+            earliest = self.Heap[0][1] == self.NextId
+            afterId = self.NextId
+        if earliest:
+            self.Loop.call_soon_threadsafe(self.Wakeup.set)
+        return afterId
+
+    def after_cancel(self, afterId):
+        #Left in the heap and skipped when it comes up
+        with self.Lock:
+            self.Cancelled.add(afterId)
+
+    async def Dispatch(self):
+        self.Wakeup = asyncio.Event()
+        self.Ready.set()
+        while True:
+            due = []
+            with self.Lock:
+                now = time.monotonic()
+                while self.Heap and self.Heap[0][0] <= now:
+                    deadline, afterId, func = heapq.heappop(self.Heap)
+                    if afterId in self.Cancelled:
+                        self.Cancelled.discard(afterId)
+                    else:
+                        due.append(func)
+                wait = self.Heap[0][0] - now if self.Heap else None
+                self.Wakeup.clear()
+            for func in due:
+                try:
+                    func()
+                except Exception as e:
+                    #Timers report their own errors (Timer.OnError); this is for anything else
+                    self.Loop.call_exception_handler({'message': "Timer callback failed", 'exception': e})
+            if due:
+                continue  #the callbacks may have queued something that is already due
+            try:
+                await asyncio.wait_for(self.Wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+#Timers that the socket API can see
+    def Register(self, timer, name):
+        with self.Lock:
+            self.NextTimerId += 1
+            self.Timers[self.NextTimerId] = (name, timer)
+            return self.NextTimerId
+
+    def Unregister(self, timerId):
+        with self.Lock:
+            self.Timers.pop(timerId, None)
+
+    def TimerStates(self):
+        with self.Lock:
+            timers = list(self.Timers.items())
+        states = []
+        for timerId, (name, timer) in timers:
+            with timer.Lock:
+                remaining = max(0.0, timer.Deadline - time.monotonic()) if timer.isRunning else timer.CurrentTime
+                states.append({'id': timerId, 'name': name, 'remaining': round(remaining, 1),
+                               'running': timer.isRunning})
+        return states
+
+#Local control API. Needs Unix sockets, so it is skipped on Windows
+#Any failure here only means there is no socket API; the timers work without it
+    def Serve(self):
+        if not hasattr(socket, 'AF_UNIX'):
+            return False
+        try:
+            #Another process already serves this path: leave it to that one
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.SocketPath)
+                return False
+            except (ConnectionRefusedError, FileNotFoundError):
+                #Left behind by a process that is gone
+                if os.path.exists(self.SocketPath):
+                    os.remove(self.SocketPath)
+            finally:
+                probe.close()
+            future = asyncio.run_coroutine_threadsafe(
+                asyncio.start_unix_server(self.HandleClient, path=self.SocketPath), self.Loop)
+            future.result()
+            return True
+        except OSError:
+            return False
+
+    async def HandleClient(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                    if request.get('cmd') == 'watch':
+                        #Stream every timer's state once a second until the client leaves
+                        while True:
+                            writer.write((json.dumps({'ok': True, 'timers': self.TimerStates()}) + "\n").encode())
+                            await writer.drain()
+                            await asyncio.sleep(1)
+                    reply = self.Command(request)
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {'ok': False, 'error': str(e)}
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    def Command(self, request):
+        cmd = request['cmd']
+        if cmd == 'list':
+            return {'ok': True, 'timers': self.TimerStates()}
+        if cmd == 'create':
+            seconds = float(request['seconds'])
+            if not math.isfinite(seconds) or seconds <= 0:
+                raise ValueError("Timer duration must be positive")
+            timer = Timer(self)
+            timer.Resolution = 1.0  #nobody paints it, one tick a second is plenty
+            timer.SetTime(seconds)
+            return {'ok': True, 'id': self.Register(timer, request.get('name', 'Timer'))}
+        if cmd in ('start', 'pause', 'reset', 'remove'):
+            with self.Lock:
+                if int(request['id']) not in self.Timers:
+                    raise ValueError(f"no timer {request['id']}")
+                name, timer = self.Timers[int(request['id'])]
+            if cmd == 'remove':
+                timer.Stop()
+                self.Unregister(int(request['id']))
+            else:
+                {'start': timer.Start, 'pause': timer.Pause, 'reset': timer.Reset}[cmd]()
+            #Let a window showing this timer repaint
+            timer.OnTick()
+            return {'ok': True}
+        raise ValueError(f"unknown command {cmd!r}")
 
 #=================================================================================================
 class SessionManager:
+    SharedManagers = {}  #absolute path -> SessionManager
+
+#Windows of one process share the manager of a file, so their appends agree
+    @classmethod
+    def Shared(cls, RecordsFile = "SessionRecords.json"):
+        key = os.path.abspath(RecordsFile)
+        if key not in cls.SharedManagers:
+            cls.SharedManagers[key] = cls(RecordsFile)
+        return cls.SharedManagers[key]
 
 #Create a tempelary records in session
+#History is kept in a folder named after RecordsFile, one append-only YYYY-MM.jsonl per
+#month (one JSON record per line) plus index.json with the totals of every earlier month.
+#Only the index and this month's file are read at startup; older months load on demand.
     def __init__(self, RecordsFile = "SessionRecords.json"):
-        self.RecordsFile = RecordsFile
-        self.SessionRecords = []
+        self.RecordsFile = RecordsFile  #single-file history of older versions, migrated on load
+        self.Folder = os.path.splitext(RecordsFile)[0]
+        self.IndexFile = os.path.join(self.Folder, "index.json")
+        self.CurrentMonth = datetime.now().strftime('%Y-%m')
+        self.SessionRecords = []  #records of CurrentMonth (always loaded)
+        self.Index = {}           #earlier month -> {'count', 'size', 'days': {"date|type": [sessions, seconds]}}
+        self.MonthCache = {}      #earlier month -> records, once something has asked for them
+        #Running totals of completed sessions over all months
+        self.TotalSeconds = 0
+        self.DayTotals = {}  #(date, type) -> [sessions, seconds]
+        self.Generation = 0  #bumped whenever records are replaced, so caches know to rebuild
+        self.LogLock = threading.Lock()
+        self.TornLine = False     #this month's file ends in a half-written line (crash while saving)
         #Check History about the session of recorded
         self.LoadRecords()
 
-#Add a new record
+#GETTER of the running totals (O(1), no scan of the records)
+    def get_TotalSeconds(self):
+        return self.TotalSeconds
+    def get_DayTotals(self, day, kind):
+        return tuple(self.DayTotals.get((day, kind), (0, 0)))
+
+#Count a record into the running totals
+    def AddToTotals(self, record):
+        if record['completed']:
+            self.TotalSeconds += record['duration']
+            totals = self.DayTotals.setdefault((record['date'], record['type']), [0, 0])
+            totals[0] += 1
+            totals[1] += record['duration']
+
+    def RebuildTotals(self):
+        self.Generation += 1
+        self.TotalSeconds = 0
+        self.DayTotals = {}
+        for entry in self.Index.values():
+            for key, (sessions, seconds) in entry['days'].items():
+                day, kind = key.split('|')
+                self.DayTotals[(day, kind)] = [sessions, seconds]
+                self.TotalSeconds += seconds
+        for record in self.SessionRecords:
+            self.AddToTotals(record)
+
+#Index entry of one month: record count, file size, completed totals per day and type
+    def Summarize(self, month, records):
+        days = {}
+        for record in records:
+            if record['completed']:
+                totals = days.setdefault(f"{record['date']}|{record['type']}", [0, 0])
+                totals[0] += 1
+                totals[1] += record['duration']
+        return {'count': len(records), 'size': os.path.getsize(self.PartitionFile(month)), 'days': days}
+
+    def PartitionFile(self, month):
+        return os.path.join(self.Folder, month + ".jsonl")
+
+#Months that have records, oldest first
+    def Months(self):
+        months = sorted(self.Index)
+        if self.SessionRecords:
+            months.append(self.CurrentMonth)
+        return months
+
+    def MonthRecords(self, month, keep=True):
+        if month == self.CurrentMonth:
+            return self.SessionRecords
+        if month in self.MonthCache:
+            return self.MonthCache[month]
+        records, torn = self.ReadPartition(month)
+        if keep:
+            self.MonthCache[month] = records
+        return records
+
+    def RecordCount(self):
+        return sum(entry['count'] for entry in self.Index.values()) + len(self.SessionRecords)
+
+#Records start..end (oldest is 0) across months; only the months in the range are read
+    def Records(self, start, end):
+        result = []
+        offset = 0
+        for month in self.Months():
+            count = len(self.SessionRecords) if month == self.CurrentMonth else self.Index[month]['count']
+            if offset + count > start and offset < end:
+                records = self.MonthRecords(month)
+                result.extend(records[max(0, start - offset):end - offset])
+            offset += count
+            if offset >= end:
+                break
+        return result
+
+#Add a new record (one line appended to its month, however long the history is)
     def AddRecords(self, record):
-        self.SessionRecords.append(record)
-        self.SaveRecords()
+        month = record['date'][:7]
+        if month > self.CurrentMonth:
+            self.RollOver(month)
+        #A session of an earlier month can be saved late (e.g. started before midnight)
+        records = self.MonthRecords(month)
+        try:
+            self.AppendLog(month, record)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save records: {str(e)}")
+            return
+        records.append(record)
+        if month != self.CurrentMonth:
+            self.Index[month] = self.Summarize(month, records)
+            self.WriteIndex()
+            self.Generation += 1  #the record is not at the end of the history
+        self.AddToTotals(record)
+
+#A new month started while the app is open: close this month into the index
+    def RollOver(self, month):
+        if self.SessionRecords:
+            self.Index[self.CurrentMonth] = self.Summarize(self.CurrentMonth, self.SessionRecords)
+            self.WriteIndex()
+        self.CurrentMonth = month
+        self.SessionRecords, self.TornLine = self.ReadPartition(month)
+        self.Generation += 1
 
-#Save a new record
+#Append one record to a month's file
+    def AppendLog(self, month, entry):
+        line = json.dumps(entry) + "\n"
+        with self.LogLock:
+            os.makedirs(self.Folder, exist_ok=True)
+            if month == self.CurrentMonth and self.TornLine:
+                line = "\n" + line  #keep the new entry off the broken line
+                self.TornLine = False
+            with open(self.PartitionFile(month), 'a') as f:
+                f.write(line)
+
+#Save every record of this month (rewrites its file, atomically)
     def SaveRecords(self):
         try:
-            with open(self.RecordsFile, 'w') as f:
-                json.dump(self.SessionRecords, f, indent=2)
+            with self.LogLock:
+                self.WritePartition(self.CurrentMonth, self.SessionRecords)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save records: {str(e)}")
 
+    def WritePartition(self, month, records):
+        os.makedirs(self.Folder, exist_ok=True)
+        tmp = self.PartitionFile(month) + ".tmp"
+        with open(tmp, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp, self.PartitionFile(month))
+        if month == self.CurrentMonth:
+            self.TornLine = False
+
+    def WriteIndex(self):
+        os.makedirs(self.Folder, exist_ok=True)
+        tmp = self.IndexFile + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.Index, f)
+        os.replace(tmp, self.IndexFile)
+
+#(records, ends in a half-written line) of one month's file
+    def ReadPartition(self, month):
+        return self.ParseLog(self.PartitionFile(month))
+
+    @staticmethod
+    def ParseLog(path):
+        records = []
+        if not os.path.exists(path):
+            return records, False
+        with open(path, 'r') as f:
+            text = f.read()
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  #half-written last line after a crash
+            if entry.get('op') == 'clear':
+                records = []  #marker written by the single-file log
+            else:
+                records.append(entry)
+        return records, bool(text) and not text.endswith("\n")
+
     def LoadRecords(self):
+        self.SessionRecords = []
+        self.Index = {}
+        self.MonthCache = {}
         try:
-            if os.path.exists(self.RecordsFile):
-                #open file for read
-                with open (self.RecordsFile,'r') as f:
-                    self.SessionRecords =json.load(f)
+            if os.path.exists(self.RecordsFile) and not os.path.isdir(self.Folder):
+                self.Migrate()
+            if os.path.exists(self.IndexFile):
+                with open(self.IndexFile, 'r') as f:
+                    self.Index = json.load(f)
+            #Earlier months the index does not cover yet (or that changed) are summarized once
+            changed = False
+            onDisk = set()
+            if os.path.isdir(self.Folder):
+                for name in os.listdir(self.Folder):
+                    month = name[:-len(".jsonl")]
+                    if not name.endswith(".jsonl") or month == self.CurrentMonth:
+                        continue
+                    onDisk.add(month)
+                    entry = self.Index.get(month)
+                    if entry is None or entry['size'] != os.path.getsize(self.PartitionFile(month)):
+                        self.Index[month] = self.Summarize(month, self.ReadPartition(month)[0])
+                        changed = True
+            for month in set(self.Index) - onDisk:
+                del self.Index[month]
+                changed = True
+            if changed:
+                self.WriteIndex()
+            self.SessionRecords, self.TornLine = self.ReadPartition(self.CurrentMonth)
         #Ensure when open is smooth
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load records: {str(e)}")
             self.SessionRecords = []
+        self.RebuildTotals()
+
+#Split the single-file history (JSON array or line log) into months, keep the old file as .bak
+    def Migrate(self):
+        with open(self.RecordsFile, 'r') as f:
+            text = f.read()
+        if text.lstrip().startswith('['):
+            records = json.loads(text)
+        else:
+            records = self.ParseLog(self.RecordsFile)[0]
+        months = {}
+        for record in records:
+            months.setdefault(record['date'][:7], []).append(record)
+        for month, monthRecords in months.items():
+            self.WritePartition(month, monthRecords)
+        os.makedirs(self.Folder, exist_ok=True)
+        os.replace(self.RecordsFile, self.RecordsFile + ".bak")
 
 #Clear all the records
     def ClearRecords(self):
-        self.SessionRecords=[]
-        self.SaveRecords()
+        with self.LogLock:
+            for month in list(self.Index) + [self.CurrentMonth]:
+                if os.path.exists(self.PartitionFile(month)):
+                    os.remove(self.PartitionFile(month))
+            self.Index = {}
+            self.MonthCache = {}
+            self.SessionRecords = []
+            self.TornLine = False
+            try:
+                self.WriteIndex()
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save records: {str(e)}")
+        self.RebuildTotals()
+#================================================================================
+#Productivity statistics from the session history
+#Sessions are summarized once per day; past days stay cached and only today is
+#worked out again, so queries run over one summary per day instead of every session
+class SessionStats:
+    def __init__(self, manager):
+        self.Manager = manager
+        self.DayCache = {}      #'YYYY-MM-DD' -> summary of a finished day
+        self.MonthCounts = {}   #earlier month -> records of it summarized into DayCache
+        self.SeenCount = 0      #records of the current month summarized into DayCache
+        self.Generation = None  #manager generation DayCache was built from
+        self.Today = None       #today's summary, recomputed on every Update
+
+    @staticmethod
+    def NewDay():
+        #focus: completed work seconds, hours: completed work seconds per hour of day
+        return {'focus': 0, 'sessions': 0, 'started': 0, 'hours': [0] * 24}
+
+    @staticmethod
+    def AddSession(day, record):
+        if record['type'] != 'Work':
+            return
+        day['started'] += 1
+        if not record['completed']:
+            return
+        day['focus'] += record['duration']
+        day['sessions'] += 1
+        #Spread the session over the hours it covered, starting at STime
+        try:
+            h, m, sec = (int(part) for part in record['STime'].split(':'))
+        except ValueError:
+            return
+        start, left = h * 3600 + m * 60 + sec, record['duration']
+        while left > 0:
+            hour = (start // 3600) % 24
+            chunk = min(left, 3600 - start % 3600)
+            day['hours'][hour] += chunk
+            start += chunk
+            left -= chunk
+
+#Bring the cache up to date: new records of past days are added, today is redone
+    def Update(self):
+        manager = self.Manager
+        if self.Generation != manager.Generation:
+            self.DayCache = {}
+            self.MonthCounts = {}
+            self.SeenCount = 0
+            self.Generation = manager.Generation
+        #Earlier months are read from disk once each, without the manager keeping them
+        for month, entry in list(manager.Index.items()):
+            if self.MonthCounts.get(month) == entry['count']:
+                continue
+            if month in self.MonthCounts:
+                #A late session landed in a month already summarized: start over
+                self.Generation = None
+                return self.Update()
+            for record in manager.MonthRecords(month, keep=False):
+                self.AddSession(self.DayCache.setdefault(record['date'], self.NewDay()), record)
+            self.MonthCounts[month] = entry['count']
+        records = manager.SessionRecords
+        today = date.today().isoformat()
+        for record in records[self.SeenCount:]:
+            if record['date'] != today:
+                self.AddSession(self.DayCache.setdefault(record['date'], self.NewDay()), record)
+        #Today's sessions are the newest ones, at the end of the list
+        end = len(records)
+        while end > self.SeenCount and records[end - 1]['date'] == today:
+            end -= 1
+        self.SeenCount = end
+        self.Today = self.NewDay()
+        for record in records[end:]:
+            if record['date'] == today:
+                self.AddSession(self.Today, record)
+        return today
+
+    def Days(self):
+        #'YYYY-MM-DD' -> summary, today included
+        today = self.Update()
+        days = dict(self.DayCache)
+        if self.Today['started']:
+            days[today] = self.Today
+        return days
+
+#Completed work seconds per day for the last n days (oldest first, missing days are 0)
+    def DailyTotals(self, n=7):
+        days = self.Days()
+        first = date.today() - timedelta(days=n - 1)
+        result = []
+        for i in range(n):
+            d = (first + timedelta(days=i)).isoformat()
+            result.append((d, days[d]['focus'] if d in days else 0))
+        return result
+
+    def WeeklyTotals(self):
+        #(ISO year, ISO week) -> completed work seconds
+        totals = {}
+        for d, day in self.Days().items():
+            key = tuple(date.fromisoformat(d).isocalendar()[:2])
+            totals[key] = totals.get(key, 0) + day['focus']
+        return totals
+
+    def MonthlyTotals(self):
+        #'YYYY-MM' -> completed work seconds
+        totals = {}
+        for d, day in self.Days().items():
+            totals[d[:7]] = totals.get(d[:7], 0) + day['focus']
+        return totals
+
+    def CompletionRate(self):
+        #completed / started work sessions, None with no sessions yet
+        days = self.Days().values()
+        started = sum(day['started'] for day in days)
+        if started == 0:
+            return None
+        return sum(day['sessions'] for day in days) / started
+
+    def Streaks(self):
+        #(current, longest) runs of consecutive days with a completed work session
+        focusDays = sorted(date.fromisoformat(d) for d, day in self.Days().items() if day['sessions'])
+        longest = run = 0
+        previous = None
+        for d in focusDays:
+            run = run + 1 if previous is not None and d - previous == timedelta(days=1) else 1
+            longest = max(longest, run)
+            previous = d
+        #The current streak is still alive if the last focus day was today or yesterday
+        current = run if previous is not None and date.today() - previous <= timedelta(days=1) else 0
+        return current, longest
+
+    def Heatmap(self):
+        #7 x 24 grid (Monday first) of completed work seconds by weekday and hour
+        grid = [[0] * 24 for _ in range(7)]
+        for d, day in self.Days().items():
+            row = grid[date.fromisoformat(d).weekday()]
+            for hour, seconds in enumerate(day['hours']):
+                row[hour] += seconds
+        return grid
+
 #================================================================================
 #Inheritance of Timer
 class PomodoroTimer(Timer):
     def __init__(self,root):
-        super().__init__() #Call the Timer Construction
+        #Call the Timer Construction; every Pomodoro window shares one TimerService loop
+        super().__init__(TimerService.Shared())
         self.root =root # root is GUI
         self.root.title("My Study Tools Box--Pomodoro Timer")
         self.root.geometry("600x700")
@@ -141,13 +801,22 @@ class PomodoroTimer(Timer):
         self.SessionCount =0
 
         #Save the all session and record in json file
-        self.sessionsManager= SessionManager ("PomodoroRecord.json")
+        self.sessionsManager= SessionManager.Shared("PomodoroRecord.json")
         self.SetTime(self.WorkTime)
         self.soundEnabled = tk.BooleanVar(value=True)
         self.popupEnabled = tk.BooleanVar(value=True)
 
+        #The engine only posts here; the GUI paints and saves when it pumps the channel
+        self.Events = TimerEvents()
+        self.Rendered = {}  #widget -> last text/value painted, to skip repaints
+
         self.design()
         self.UpdateDisplay()
+        self.PumpAfter = None
+        self.PumpEvents()
+        #Visible to other windows/processes through the TimerService socket
+        self.ServiceId = self.Scheduler.Register(self, f"Pomodoro {len(self.Scheduler.Timers) + 1}")
+        self.root.bind("<Destroy>", self.OnDestroy, add="+")
 
         #GUI design
     def design(self):
@@ -157,8 +826,14 @@ class PomodoroTimer(Timer):
         notebook.add(self.TimerFrame, text="Timer")
         self.RecordsFrame = ttk.Frame(notebook, padding="20")
         notebook.add(self.RecordsFrame, text="Records")
+        self.StatsFrame = ttk.Frame(notebook, padding="20")
+        notebook.add(self.StatsFrame, text="Statistics")
         self.SetupTimerTab()
         self.SetupRecordsTab()
+        self.SetupStatsTab()
+        #Statistics are only worked out while their tab is showing
+        self.Notebook = notebook
+        notebook.bind("<<NotebookTabChanged>>", lambda event: self.RefreshStats())
 
     def SetupTimerTab(self):
         #Title
@@ -194,6 +869,10 @@ class PomodoroTimer(Timer):
         self.Progress= ttk.Progressbar(self.TimerFrame, length=400, mode='determinate')
         self.Progress.grid(row=4, column=0, columnspan=3, padx=(0,20), sticky=(tk.W, tk.E))
 
+        #Timer accuracy of the last finished session
+        self.StatsLabel= ttk.Label(self.TimerFrame, text="", font=("Arial",8), foreground="gray")
+        self.StatsLabel.grid(row=6, column=0, columnspan=3)
+
         #Choice of Time
         ChooseFrame= ttk.LabelFrame(self.TimerFrame, text="Choice Of Time", padding="10")
         ChooseFrame.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0,20))
@@ -234,10 +913,16 @@ class PomodoroTimer(Timer):
             self.RecordsTree.column(col, width=100)
 
         #Scrollbar
-        scrollbar= ttk.Scrollbar(self.RecordsFrame, orient="vertical", command=self.RecordsTree.yview)
-        self.RecordsTree.configure(yscrollcommand=scrollbar.set)
+        self.RecordsScrollbar= ttk.Scrollbar(self.RecordsFrame, orient="vertical", command=self.RecordsTree.yview)
+        #Older history is inserted a page at a time as the user scrolls down
+        self.RecordsTree.configure(yscrollcommand=self.OnRecordsScroll)
+        self.PageSize= 100
+        self.KnownCount= 0    #records the tree has been brought up to date with
+        self.KnownGeneration= None
+        self.ShownCount= 0    #newest records inserted in the tree
+        self.PagePending= None
         self.RecordsTree.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.RecordsScrollbar.pack(side="right", fill="y")
         
         #Summary Record (To record the session number and the total time)
         SummaryFrame= ttk.LabelFrame(self.RecordsFrame, text="Today's Summary", padding="10")
@@ -247,7 +932,55 @@ class PomodoroTimer(Timer):
         self.RefreshRecords()
 
     #===================================================================================
-    
+    #Statistics Tab GUI
+    def SetupStatsTab(self):
+        self.Stats = SessionStats(self.sessionsManager)
+        self.ProductivityLabel = ttk.Label(self.StatsFrame, text="", font=("Arial",11), justify="left")
+        self.ProductivityLabel.pack(anchor="w", pady=(0,10))
+
+        ttk.Label(self.StatsFrame, text="Focus by weekday and hour", font=("Arial", 12, "bold")).pack(anchor="w")
+        self.HeatmapCanvas = tk.Canvas(self.StatsFrame, width=520, height=180, bg="white")
+        self.HeatmapCanvas.pack(anchor="w", pady=(5,0))
+
+    def RefreshStats(self):
+        if self.Notebook.select() != str(self.StatsFrame):
+            return
+        stats = self.Stats
+        current, longest = stats.Streaks()
+        rate = stats.CompletionRate()
+        thisWeek = tuple(date.today().isocalendar()[:2])
+        thisMonth = date.today().isoformat()[:7]
+        lines = [
+            f"Current streak: {current} day(s)   Longest streak: {longest} day(s)",
+            f"Completion rate: {'-' if rate is None else f'{rate * 100:.0f}%'}",
+            f"This week: {self.FormatHours(stats.WeeklyTotals().get(thisWeek, 0))}   "
+            f"This month: {self.FormatHours(stats.MonthlyTotals().get(thisMonth, 0))}",
+            "",
+            "Last 7 days:",
+        ]
+        for day, seconds in stats.DailyTotals(7):
+            lines.append(f"  {day}  {self.FormatHours(seconds)}")
+        self.ProductivityLabel.config(text="\n".join(lines))
+        self.DrawHeatmap(stats.Heatmap())
+
+    def FormatHours(self, seconds):
+        return f"{seconds // 3600}hrs {(seconds % 3600) // 60}min"
+
+    def DrawHeatmap(self, grid):
+        canvas = self.HeatmapCanvas
+        canvas.delete("all")
+        peak = max(max(row) for row in grid) or 1
+        left, top, cell = 40, 20, 20
+        for hour in range(0, 24, 3):
+            canvas.create_text(left + hour * cell + cell // 2, top - 10, text=str(hour), font=("Arial",8))
+        for weekday, row in enumerate(grid):
+            y = top + weekday * cell
+            canvas.create_text(left - 20, y + cell // 2, text="MTWTFSS"[weekday], font=("Arial",8))
+            for hour, seconds in enumerate(row):
+                #white for nothing, deeper red for more focus
+                shade = 255 - int(200 * seconds / peak)
+                canvas.create_rectangle(left + hour * cell, y, left + (hour + 1) * cell, y + cell,
+                                        fill=f"#ff{shade:02x}{shade:02x}", outline="#eeeeee")
 
     def setCustomTime(self):
         if self.isRunning:
@@ -292,32 +1025,38 @@ class PomodoroTimer(Timer):
             # Handle any other unexpected errors
             messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
 
+#Paint option of widget only when it differs from what is already shown
+    def Paint(self, widget, option, value):
+        if self.Rendered.get((widget, option)) != value:
+            self.Rendered[(widget, option)] = value
+            widget[option] = value
+
     def UpdateDisplay(self):
-        self.timeLabel.config(text=self.FormatTime(self.CurrentTime))
-        self.sessionLabel.config(text=f"Session:{self.SessionCount}")
+        self.Paint(self.timeLabel, 'text', self.FormatTime(self.CurrentTime))
+        self.Paint(self.sessionLabel, 'text', f"Session:{self.SessionCount}")
 
-        totalSeconds=sum(record['duration'] for record in self.sessionsManager.SessionRecords if record['completed']) 
+        totalSeconds=self.sessionsManager.get_TotalSeconds()
         hours, remainder= divmod(totalSeconds, 3600)
         minutes,_=divmod(remainder,60)
-        self.TotalTimeLabel.config(text=f"Total Time:{hours}hrs {minutes}min")
+        self.Paint(self.TotalTimeLabel, 'text', f"Total Time:{hours}hrs {minutes}min")
 
-        #Progress Bar
+        #Progress Bar (steps of 0.1%, finer changes are not visible)
         if self.OriginalTime>0:
             progressValue=((self.OriginalTime-self.CurrentTime)/self.OriginalTime)*100
-            self.Progress['value']=progressValue
+            self.Paint(self.Progress, 'value', round(progressValue, 1))
 
         #Update Title
         if self.isBreak:
             #if the remainder of SessionCount can divide 4(SessionBreak) equal to 0 and SessionCount>0 would occurs Long Break
             if self.SessionCount % self.SessionsBreak==0 and self.SessionCount>0:
-                self.titleLabel.config(text="LONG BREAK")
-                self.timeLabel.config(foreground="green")
+                self.Paint(self.titleLabel, 'text', "LONG BREAK")
+                self.Paint(self.timeLabel, 'foreground', "green")
             else:
-                self.titleLabel.config(text="SHORT BREAK")
-                self.timeLabel.config(foreground="green")
+                self.Paint(self.titleLabel, 'text', "SHORT BREAK")
+                self.Paint(self.timeLabel, 'foreground', "green")
         else:
-            self.titleLabel.config(text="WORK SESSIONS")
-            self.timeLabel.config(foreground="red")
+            self.Paint(self.titleLabel, 'text', "WORK SESSIONS")
+            self.Paint(self.timeLabel, 'foreground', "red")
 
     def StartTimer(self):
         self.Start()
@@ -334,15 +1073,59 @@ class PomodoroTimer(Timer):
 
 #Function
     def SkipTimer(self):
+        #Nothing to skip before the first Start
+        if self.StartTime is None:
+            return
         if self.isRunning:
             self.Pause()
         self.OnTimerFinished()
 
+#Engine side: only post to the channel, never touch Tk or files here
     def OnTick(self):
-        self.root.after(0, self.UpdateDisplay)
+        self.Events.PostTick(self.CurrentTime)
+    def OnError(self, error):
+        self.Events.PostEvent('error', error)
     def OnTimerFinished(self):
-        EndTime=datetime.now()
-        duration = self.OriginalTime - self.CurrentTime
+        self.Events.PostEvent('finished', {
+            'EndTime': datetime.now(),
+            'duration': round(self.OriginalTime - self.CurrentTime),
+            'completed': self.CurrentTime == 0,
+        })
+
+#GUI side: runs on the Tk loop, paints the newest tick and handles finished sessions
+    def PumpEvents(self):
+        #Reschedule first, so one failing event never stops the pump
+        self.PumpAfter = self.root.after(20, self.PumpEvents)
+        tick, events = self.Events.Drain()
+        for kind, data in events:
+            try:
+                if kind == 'finished':
+                    self.FinishSession(data)
+                elif kind == 'error':
+                    messagebox.showerror("Error", f"The timer stopped: {str(data)}")
+                    self.UpdateDisplay()
+            except Exception as e:
+                messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
+        if tick is not None and not events:
+            self.UpdateDisplay()
+
+    def OnDestroy(self, event):
+        if event.widget is not self.root:
+            return
+        self.Stop()
+        self.Scheduler.Unregister(self.ServiceId)
+        if self.PumpAfter is not None:
+            self.root.after_cancel(self.PumpAfter)
+
+    def FinishSession(self, data):
+        #A timer that never started has no session to record
+        if self.StartTime is None:
+            return
+        EndTime=data['EndTime']
+        duration = data['duration']
+        stats = self.GetStats()
+        if stats['finishDriftMs'] is not None:
+            self.StatsLabel.config(text=f"Finished {stats['finishDriftMs']:.0f}ms late, tick jitter {stats['jitterMs']:.1f}ms over {stats['ticks']} ticks")
 
         SessionRecords={
             'date': self.StartTime.strftime('%Y-%m-%d'),
@@ -353,7 +1136,7 @@ class PomodoroTimer(Timer):
             else 'Work',
             'duration':duration,
             'planniedDuration':self.OriginalTime,
-            'completed': self.CurrentTime ==0
+            'completed': data['completed']
         }
 
         self.sessionsManager.AddRecords(SessionRecords)
@@ -376,28 +1159,60 @@ class PomodoroTimer(Timer):
                     message=f"Session{self.SessionCount} complete!\n Time For a Short Break({self.ShortBreak//60}minutes)!!"
                 messagebox.showinfo("Session Complete", message)
         self.UpdateDisplay()
-        self.RefreshRecords()
+        self.AddNewRecords()
+        self.RefreshStats()
 
+#Rebuild the Records tab from scratch (Refresh button, after Clear All)
     def RefreshRecords(self):
-        for item in self.RecordsTree.get_children():
-            self.RecordsTree.delete(item)
-
-        for record in reversed(self.sessionsManager.SessionRecords):
-            durationMins= record['duration']//60
-            durationSecs= record['duration']%60
-            durationStr= f"{durationMins}min {durationSecs}sec"
-            completed="Yes" if record['completed'] else "No"
-            self.RecordsTree.insert('','end',values=(
-                record['date'], record['type'], durationStr,completed,record['STime'], record['ETime']
-            ))
+        self.RecordsTree.delete(*self.RecordsTree.get_children())
+        self.KnownCount= self.sessionsManager.RecordCount()
+        self.KnownGeneration= self.sessionsManager.Generation
+        self.ShownCount= 0
+        self.LoadOlderRecords()
+        self.UpdateSummary()
+
+#Put only the sessions added since the last update on top of the tree
+    def AddNewRecords(self):
+        count= self.sessionsManager.RecordCount()
+        if count < self.KnownCount or self.sessionsManager.Generation != self.KnownGeneration:
+            self.RefreshRecords()
+            return
+        for record in self.sessionsManager.Records(self.KnownCount, count):
+            self.RecordsTree.insert('', 0, values=self.RecordValues(record))
+        self.ShownCount += count - self.KnownCount
+        self.KnownCount= count
+        self.UpdateSummary()
+
+#Insert the next page of older sessions at the bottom of the tree
+    def LoadOlderRecords(self):
+        self.PagePending= None
+        end= self.KnownCount - self.ShownCount
+        start= max(0, end - self.PageSize)
+        #Reads older months from disk only when the page reaches them
+        for record in reversed(self.sessionsManager.Records(start, end)):
+            self.RecordsTree.insert('', 'end', values=self.RecordValues(record))
+        self.ShownCount += end - start
+
+    def OnRecordsScroll(self, first, last):
+        self.RecordsScrollbar.set(first, last)
+        #Near the bottom and there is more history: load it once Tk is idle
+        if float(last) > 0.9 and self.ShownCount < self.KnownCount and self.PagePending is None:
+            self.PagePending= self.root.after_idle(self.LoadOlderRecords)
+
+    def RecordValues(self, record):
+        durationMins= record['duration']//60
+        durationSecs= record['duration']%60
+        durationStr= f"{durationMins}min {durationSecs}sec"
+        completed="Yes" if record['completed'] else "No"
+        return (record['date'], record['type'], durationStr,completed,record['STime'], record['ETime'])
 
+#Today's Summary straight from the SessionManager totals
+    def UpdateSummary(self):
         today= datetime.now().strftime('%Y-%m-%d')
-        todayRecords=[r for r in self.sessionsManager.SessionRecords if r['date']== today and r['completed']]
-        WorkSessions=[r for r in todayRecords if r['type'] == 'Work']
-        TotalWorkTime= sum(r['duration'] for r in WorkSessions)
+        WorkSessions, TotalWorkTime= self.sessionsManager.get_DayTotals(today, 'Work')
         workHrs= TotalWorkTime//3600
         workMin=(TotalWorkTime % 3600)//60
-        SummaryText= f"Today: {len(WorkSessions)} Work Session, {workHrs}hrs {workMin}min Total"
+        SummaryText= f"Today: {WorkSessions} Work Session, {workHrs}hrs {workMin}min Total"
         self.SummaryLabel.config(text=SummaryText)
 
 #Clear All Records
@@ -411,8 +1226,10 @@ class PomodoroTimer(Timer):
 #=====================================================================================================
 #Final Call Main Function
 #=====================================================================================================
-def main():
-    root = tk.Tk()
+def main(parent=None):
+    #Opened from the launcher: parent is its Tk root, so use a window of that root
+    ownRoot = parent is None
+    root = tk.Tk() if ownRoot else tk.Toplevel(parent)
     PomodoroTimer(root)
 
     # Center the window
@@ -420,7 +1237,8 @@ def main():
     x = (root.winfo_screenwidth() // 2) - (root.winfo_width() // 2)
     y = (root.winfo_screenheight() // 2) - (root.winfo_height() // 2)
     root.geometry(f"+{x}+{y}")
-    root.mainloop()
+    if ownRoot:
+        root.mainloop()
 
 if __name__ == "__main__":
     main()
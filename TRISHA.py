@@ -1,7 +1,28 @@
 from tkinter import *
 from tkinter import ttk
 import tkinter.messagebox
-from datetime import datetime
+import tkinter.filedialog
+from datetime import datetime, date, MINYEAR, MAXYEAR
+from array import array
+import argparse
+import csv
+import math
+import mmap
+import os
+import queue
+import re
+import shutil
+import struct
+import sys
+import threading
+import zlib
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+from bisect import bisect_left, bisect_right
+from heapq import merge
 
 class Expense:
     def __init__(self, date, name, amount, category, account, note=""):
@@ -102,41 +123,1367 @@ class VariableExpense(Expense):
         return f"[VARIABLE] {self.get_date()}: {self.get_name()} - RM{self.get_amount():.2f}"
 
 
+class ExpenseTable:
+    """Column store for expenses.
+
+    Dates are kept as ordinals, amounts as integer cents, category and account
+    as small dictionary codes and the Expense/Fixed/Variable type as a flag.
+    Rows are read back through ExpenseRow, which has the same getters as Expense.
+    Deleted rows are only flagged so row numbers stay stable. Every row also
+    carries a persistent expense id that is written to the file.
+    """
+
+    MARKERS = ("", "FIXED", "VARIABLE")  # kind flag -> file marker
+    MAX_CENTS = 100_000_000_000          # RM 1 billion; keeps per-day sums well inside the 'q' columns
+
+    def __init__(self):
+        self.dates = array('i')        # date ordinals
+        self.amounts = array('q')      # amounts in cents
+        self.categories = array('H')   # codes into self.category_names
+        self.accounts = array('H')     # codes into self.account_names
+        self.kinds = array('b')        # 0 = Expense, 1 = FixedExpense, 2 = VariableExpense
+        self.alive = bytearray()       # 0 once a row is removed
+        self.ids = array('q')          # persistent expense ids
+        self.row_of_id = {}            # expense id -> row (None until get_row rebuilds it)
+        self.next_id = 1
+        self.generated_ids = 0         # ids handed out to rows that had none
+        self.names = []
+        self.notes = []
+        self.category_names = []
+        self.category_codes = {}
+        self.account_names = []
+        self.account_codes = {}
+        self.live = 0
+
+    def __len__(self):
+        return self.live
+
+    def __iter__(self):
+        alive = self.alive
+        for row in range(len(alive)):
+            if alive[row]:
+                yield ExpenseRow(self, row)
+
+    def view(self, row):
+        return ExpenseRow(self, row)
+
+    def encode(self, names, codes, value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def append(self, expense):
+        # Store an (already validated) Expense object, return its row number
+        if isinstance(expense, FixedExpense):
+            kind = 1
+        elif isinstance(expense, VariableExpense):
+            kind = 2
+        else:
+            kind = 0
+        return self.append_fields(kind, expense.get_date(), expense.get_name(), expense.get_amount(),
+                                  expense.get_category(), expense.get_account(), expense.get_note())
+
+    @staticmethod
+    def clean(text):
+        # "|" and newlines would break the expenses.txt record format
+        return text.replace("|", "/").replace("\r", " ").replace("\n", " ").strip()
+
+    def append_fields(self, kind, date_str, name, amount, category, account, note="", expense_id=None):
+        # Same checks as the Expense setters, without building an Expense object
+        try:
+            year, month, day = date_str.split("-")
+            ordinal = date(int(year), int(month), int(day)).toordinal()
+        except ValueError:
+            raise ValueError("Date must be in YYYY-MM-DD format")
+        name, category, account, note = self.clean(name), self.clean(category), self.clean(account), self.clean(note)
+        if not name:
+            raise ValueError("Expense name cannot be empty")
+        try:
+            value = float(amount)
+        except ValueError:
+            raise ValueError("Amount must be a valid number")
+        if not math.isfinite(value):
+            raise ValueError("Amount must be a valid number")
+        cents = round(value * 100)
+        if cents <= 0:
+            raise ValueError("Amount must be greater than 0")
+        if cents > self.MAX_CENTS:
+            raise ValueError("Amount is too large")
+        if not category:
+            raise ValueError("Category cannot be empty")
+        if not account:
+            raise ValueError("Account cannot be empty")
+        row_of_id = self.id_map()
+        if expense_id is None:
+            expense_id = self.next_id
+            self.generated_ids += 1
+        elif expense_id in row_of_id:
+            raise ValueError(f"Duplicate expense id {expense_id}")
+        self.next_id = max(self.next_id, expense_id + 1)
+
+        row = len(self.alive)
+        self.ids.append(expense_id)
+        row_of_id[expense_id] = row
+        self.dates.append(ordinal)
+        self.amounts.append(cents)
+        self.categories.append(self.encode(self.category_names, self.category_codes, category))
+        self.accounts.append(self.encode(self.account_names, self.account_codes, account))
+        self.kinds.append(kind)
+        self.alive.append(1)
+        self.names.append(name)
+        self.notes.append(note)
+        self.live += 1
+        return row
+
+    def append_line(self, line):
+        # Parse one line of expenses.txt straight into the columns
+        parts = line.split('|')
+        if parts[0] in ("FIXED", "VARIABLE"):
+            kind = self.MARKERS.index(parts[0])
+            _, date_str, name, amount, category, account, *rest = parts
+        else:
+            # backward compatibility (old lines without marker)
+            kind = 0
+            date_str, name, amount, category, account, *rest = parts
+        # the id is the last field; lines written before ids existed have none.
+        # Older saves could leave a "|" inside the note, so rejoin the rest.
+        expense_id = None
+        if len(rest) > 1 and rest[-1].isdigit():
+            expense_id = int(rest.pop())
+        elif len(rest) > 1 and not rest[-1]:
+            rest.pop()
+        note = "|".join(rest)
+        return self.append_fields(kind, date_str, name, amount, category, account, note, expense_id)
+
+    def truncate(self, rows):
+        # Drop every row from `rows` on: undoes a bulk append that failed part way
+        row_of_id = self.id_map()
+        for row in range(rows, len(self.alive)):
+            if self.alive[row]:
+                self.live -= 1
+                del row_of_id[self.ids[row]]
+        for column in (self.dates, self.amounts, self.categories, self.accounts, self.kinds, self.alive,
+                       self.ids, self.names, self.notes):
+            del column[rows:]
+
+    def id_map(self):
+        if self.row_of_id is None:
+            alive = self.alive
+            self.row_of_id = {expense_id: row for row, expense_id in enumerate(self.ids) if alive[row]}
+        return self.row_of_id
+
+    def get_row(self, expense_id):
+        return self.id_map().get(expense_id)
+
+    def remove(self, expense):
+        if self.alive[expense.row]:
+            self.alive[expense.row] = 0
+            self.live -= 1
+            del self.id_map()[self.ids[expense.row]]
+
+    # --- BINARY SNAPSHOT ---
+    # header: magic, text size, text mtime (ns), crc of the text tail, rows, payload crc
+    SNAPSHOT_MAGIC = b"EXPSNAP1"
+    SNAPSHOT_HEADER = struct.Struct("<8sqqIqI")
+
+    def write_snapshot(self, path, order_ordinals, order_rows, text_size, text_mtime_ns, tail_crc):
+        sections = [self.dates.tobytes(), self.amounts.tobytes(), self.categories.tobytes(),
+                    self.accounts.tobytes(), self.kinds.tobytes(), self.ids.tobytes(), bytes(self.alive),
+                    array('i', order_ordinals).tobytes(), array('i', order_rows).tobytes()]
+        for strings in (self.names, self.notes, self.category_names, self.account_names):
+            sections.append("\n".join(strings).encode("utf-8"))
+        payload = b"".join(struct.pack("<q", len(section)) + section for section in sections)
+        header = self.SNAPSHOT_HEADER.pack(self.SNAPSHOT_MAGIC, text_size, text_mtime_ns, tail_crc,
+                                           len(self.alive), zlib.crc32(payload))
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def read_snapshot(path):
+        # Returns (table, ordinals, rows, (text_size, text_mtime_ns, tail_crc)) or None
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                head = ExpenseTable.SNAPSHOT_HEADER
+                if len(mm) < head.size:
+                    return None
+                magic, text_size, text_mtime_ns, tail_crc, rows, payload_crc = head.unpack_from(mm)
+                view = memoryview(mm)
+                try:
+                    if magic != ExpenseTable.SNAPSHOT_MAGIC or zlib.crc32(view[head.size:]) != payload_crc:
+                        return None
+                    sections, pos = [], head.size
+                    while pos < len(mm):
+                        (length,) = struct.unpack_from("<q", mm, pos)
+                        sections.append(view[pos + 8:pos + 8 + length].tobytes())
+                        pos += 8 + length
+                finally:
+                    view.release()
+        except (OSError, ValueError):
+            return None
+        if len(sections) != 13:
+            return None
+
+        table = ExpenseTable()
+        order_ordinals, order_rows = array('i'), array('i')
+        columns = [table.dates, table.amounts, table.categories, table.accounts, table.kinds, table.ids]
+        for column, section in zip(columns + [order_ordinals, order_rows], sections[:6] + sections[7:9]):
+            column.frombytes(section)
+        table.alive = bytearray(sections[6])
+        names, notes, category_names, account_names = [section.decode("utf-8").split("\n")
+                                                        for section in sections[9:]]
+        table.names = names if rows else []
+        table.notes = notes if rows else []
+        # category and account names are never empty, so [""] means no names at all
+        table.category_names = [name for name in category_names if name]
+        table.account_names = [name for name in account_names if name]
+        if any(len(column) != rows for column in columns + [table.alive, table.names, table.notes]):
+            return None
+        table.category_codes = {name: code for code, name in enumerate(table.category_names)}
+        table.account_codes = {name: code for code, name in enumerate(table.account_names)}
+        table.live = table.alive.count(1)
+        table.next_id = max(table.ids, default=0) + 1
+        table.row_of_id = None  # rebuilt on first lookup, keeps startup short
+        return table, order_ordinals, order_rows, (text_size, text_mtime_ns, tail_crc)
+
+
+class ExpenseRow:
+    """Read-only Expense view over one row of an ExpenseTable."""
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __eq__(self, other):
+        return isinstance(other, ExpenseRow) and other.table is self.table and other.row == self.row
+
+    def __hash__(self):
+        return hash(self.row)
+
+    def get_id(self):
+        return self.table.ids[self.row]
+
+    def get_date(self):
+        return date.fromordinal(self.table.dates[self.row]).isoformat()
+
+    def get_name(self):
+        return self.table.names[self.row]
+
+    def get_amount(self):
+        return self.table.amounts[self.row] / 100
+
+    def get_category(self):
+        return self.table.category_names[self.table.categories[self.row]]
+
+    def get_account(self):
+        return self.table.account_names[self.table.accounts[self.row]]
+
+    def get_note(self):
+        return self.table.notes[self.row]
+
+    def is_fixed(self):
+        return self.table.kinds[self.row] == 1
+
+    def to_file_format(self):
+        line = f"{self.get_date()}|{self.get_name()}|{self.get_amount()}|{self.get_category()}|{self.get_account()}|{self.get_note()}|{self.get_id()}\n"
+        marker = ExpenseTable.MARKERS[self.table.kinds[self.row]]
+        return f"{marker}|{line}" if marker else line
+
+    def __str__(self):
+        marker = ExpenseTable.MARKERS[self.table.kinds[self.row]] or "Expense"
+        return f"[{marker}] {self.get_date()}: {self.get_name()} - RM{self.get_amount():.2f}"
+
+
+class ExpenseIndex:
+    """In-memory index of ExpenseTable rows by (year, month), category and date ordinal.
+
+    The date order is the source of truth; per-month and per-category buckets
+    are cut from it the first time a month is queried and then kept up to date.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.by_month = {}           # (year, month) -> [row, ...], built on first use
+        self.by_month_category = {}  # (year, month, category code) -> [row, ...]
+        self.ordinals = []           # sorted date ordinals
+        self.by_ordinal = []         # rows in the same order as self.ordinals
+
+    def load_order(self, ordinals, rows):
+        # Restore a saved date order (see ExpenseTable.write_snapshot)
+        self.ordinals = list(ordinals)
+        self.by_ordinal = list(rows)
+        self.by_month = {}
+        self.by_month_category = {}
+
+    def month(self, year, month):
+        key = (year, month)
+        if key not in self.by_month:
+            first = date(year, month, 1).toordinal()
+            if month == 12:
+                following = date(year, 12, 31).toordinal() + 1  # also fine for December 9999
+            else:
+                following = date(year, month + 1, 1).toordinal()
+            lo = bisect_left(self.ordinals, first)
+            hi = bisect_left(self.ordinals, following)
+            rows = self.by_ordinal[lo:hi]
+            self.by_month[key] = rows
+            categories = self.table.categories
+            for row in rows:
+                self.by_month_category.setdefault((year, month, categories[row]), []).append(row)
+        return self.by_month[key]
+
+    def add(self, row):
+        ordinal = self.table.dates[row]
+        d = date.fromordinal(ordinal)
+        if (d.year, d.month) in self.by_month:
+            self.by_month[(d.year, d.month)].append(row)
+            self.by_month_category.setdefault((d.year, d.month, self.table.categories[row]), []).append(row)
+        pos = bisect_right(self.ordinals, ordinal)
+        self.ordinals.insert(pos, ordinal)
+        self.by_ordinal.insert(pos, row)
+
+    def add_many(self, rows):
+        # Bulk add: merge the rows into the date order once; buckets are re-cut lazily
+        dates = self.table.dates
+        added = sorted((dates[row], row) for row in rows)
+        merged = list(merge(zip(self.ordinals, self.by_ordinal), added))
+        self.ordinals = [ordinal for ordinal, row in merged]
+        self.by_ordinal = [row for ordinal, row in merged]
+        self.by_month = {}
+        self.by_month_category = {}
+
+    def remove(self, row):
+        ordinal = self.table.dates[row]
+        d = date.fromordinal(ordinal)
+        if (d.year, d.month) in self.by_month:
+            self.by_month[(d.year, d.month)].remove(row)
+            self.by_month_category[(d.year, d.month, self.table.categories[row])].remove(row)
+        for pos in range(bisect_left(self.ordinals, ordinal), bisect_right(self.ordinals, ordinal)):
+            if self.by_ordinal[pos] == row:
+                del self.ordinals[pos]
+                del self.by_ordinal[pos]
+                break
+
+    def query(self, year=None, month=None, category=None):
+        # year/month of None means "any"; only the matching months are touched
+        if not self.ordinals:
+            return []
+        if year is None:
+            years = range(date.fromordinal(self.ordinals[0]).year, date.fromordinal(self.ordinals[-1]).year + 1)
+        else:
+            years = [year]
+        months = range(1, 13) if month is None else [month]
+        code = None if category is None else self.table.category_codes.get(category)
+        result = []
+        for y in years:
+            for m in months:
+                rows = self.month(y, m)
+                if category is None:
+                    result.extend(rows)
+                elif rows:
+                    result.extend(self.by_month_category.get((y, m, code), ()))
+        return result
+
+    def date_range(self, start, end):
+        # Rows dated start..end inclusive ("YYYY-MM-DD"), oldest first
+        lo = bisect_left(self.ordinals, datetime.strptime(start, "%Y-%m-%d").toordinal())
+        hi = bisect_right(self.ordinals, datetime.strptime(end, "%Y-%m-%d").toordinal())
+        return self.by_ordinal[lo:hi]
+
+
+class SpendingLedger:
+    """Running spending totals in cents per (year, month) and per (year, month, category).
+
+    A month is summed from the index the first time it is asked for; after
+    that save and delete adjust its totals in O(1).
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.month_totals = {}     # (year, month) -> cents
+        self.category_totals = {}  # (year, month, category) -> cents
+
+    def load_month(self, year, month):
+        if (year, month) in self.month_totals:
+            return
+        table = self.index.table
+        total = 0
+        for row in self.index.month(year, month):
+            key = (year, month, table.category_names[table.categories[row]])
+            self.category_totals[key] = self.category_totals.get(key, 0) + table.amounts[row]
+            total += table.amounts[row]
+        self.month_totals[(year, month)] = total
+
+    def change(self, row, sign):
+        table = self.index.table
+        d = date.fromordinal(table.dates[row])
+        if (d.year, d.month) in self.month_totals:
+            cents = sign * table.amounts[row]
+            key = (d.year, d.month, table.category_names[table.categories[row]])
+            self.month_totals[(d.year, d.month)] += cents
+            self.category_totals[key] = self.category_totals.get(key, 0) + cents
+
+    def add(self, row):
+        self.change(row, 1)
+
+    def remove(self, row):
+        self.change(row, -1)
+
+    def clear(self):
+        # after bulk changes: months are summed again on demand
+        self.month_totals = {}
+        self.category_totals = {}
+
+    def spent(self, year, month, category=None):
+        self.load_month(year, month)
+        if category is None:
+            return self.month_totals[(year, month)] / 100
+        return self.category_totals.get((year, month, category), 0) / 100
+
+
+class SpendingTrends:
+    """Daily and monthly spending series for the dashboard, in cents.
+
+    Each series is built from the index in one pass the first time a chart
+    asks for it; after that add/remove keep it current like SpendingLedger.
+    """
+
+    GROUPS = ("category", "account")
+
+    def __init__(self, index):
+        self.index = index
+        self.days = None       # sorted ordinals of days with spending
+        self.day_cents = None  # cents spent on each of those days
+        self.monthly = {}      # group -> {(month number, code): cents}
+
+    def load_days(self):
+        if self.days is not None:
+            return
+        amounts = self.index.table.amounts
+        self.days = array('i')
+        self.day_cents = array('q')
+        for ordinal, row in zip(self.index.ordinals, self.index.by_ordinal):
+            if self.days and self.days[-1] == ordinal:
+                self.day_cents[-1] += amounts[row]
+            else:
+                self.days.append(ordinal)
+                self.day_cents.append(amounts[row])
+
+    def load_group(self, group):
+        if group in self.monthly:
+            return self.monthly[group]
+        table = self.index.table
+        codes = table.categories if group == "category" else table.accounts
+        totals = {}
+        month_no = None
+        next_month = 0  # first ordinal of the month after month_no
+        for ordinal, row in zip(self.index.ordinals, self.index.by_ordinal):
+            if ordinal >= next_month:
+                d = date.fromordinal(ordinal)
+                month_no = d.year * 12 + d.month - 1
+                next_month = self.month_start(month_no + 1)
+            key = (month_no, codes[row])
+            totals[key] = totals.get(key, 0) + table.amounts[row]
+        self.monthly[group] = totals
+        return totals
+
+    @staticmethod
+    def month_start(month_no):
+        return date(month_no // 12, month_no % 12 + 1, 1).toordinal()
+
+    def change(self, row, sign):
+        table = self.index.table
+        ordinal = table.dates[row]
+        cents = sign * table.amounts[row]
+        if self.days is not None:
+            pos = bisect_left(self.days, ordinal)
+            if pos < len(self.days) and self.days[pos] == ordinal:
+                self.day_cents[pos] += cents
+            else:
+                self.days.insert(pos, ordinal)
+                self.day_cents.insert(pos, cents)
+        d = date.fromordinal(ordinal)
+        for group, totals in self.monthly.items():
+            code = (table.categories if group == "category" else table.accounts)[row]
+            key = (d.year * 12 + d.month - 1, code)
+            totals[key] = totals.get(key, 0) + cents
+
+    def add(self, row):
+        self.change(row, 1)
+
+    def remove(self, row):
+        self.change(row, -1)
+
+    def clear(self):
+        self.days = None
+        self.day_cents = None
+        self.monthly = {}
+
+    def span(self):
+        # (first, last) day ordinal with spending, or None for an empty ledger
+        self.load_days()
+        if not self.days:
+            return None
+        return self.days[0], self.days[-1]
+
+    def daily(self, start, end, points):
+        # RM per day over start..end, averaged into at most `points` equal bins
+        self.load_days()
+        width = max(1, -(-(end - start + 1) // points))  # days per bin
+        bins = [0] * (-(-(end - start + 1) // width))
+        for pos in range(bisect_left(self.days, start), bisect_right(self.days, end)):
+            bins[(self.days[pos] - start) // width] += self.day_cents[pos]
+        xs = [start + i * width for i in range(len(bins))]
+        return xs, [cents / 100 / width for cents in bins]
+
+    def months(self, group, start, end):
+        # (month start ordinals, {name: [RM per month]}) for the months touching start..end
+        totals = self.load_group(group)
+        table = self.index.table
+        names = table.category_names if group == "category" else table.account_names
+        first, last = date.fromordinal(start), date.fromordinal(end)
+        month_nos = range(first.year * 12 + first.month - 1, last.year * 12 + last.month)
+        series = {}
+        for (month_no, code), cents in totals.items():
+            if month_nos.start <= month_no < month_nos.stop and cents:
+                series.setdefault(names[code], [0.0] * len(month_nos))[month_no - month_nos.start] = cents / 100
+        return [self.month_start(m) for m in month_nos], series
+
+
+class SearchIndex:
+    """Inverted index over expense names and notes with prefix matching.
+
+    Every word of a query is matched as a prefix ("gra" finds "Grab") and all
+    words must match. Prefix results are cached until the index changes.
+    Known limit: on 1M expenses an uncached prefix of a few letters takes a
+    couple of milliseconds and a one-letter prefix about 0.1 s, since every
+    matching word's rows are unioned.
+    """
+
+    WORD = re.compile(r"\w+")
+
+    def __init__(self, table):
+        self.table = table
+        self.postings = {}     # word -> set of rows
+        self.vocabulary = []   # sorted words, for prefix lookups
+        self.prefix_cache = {}
+
+    def words(self, row):
+        return set(self.WORD.findall(f"{self.table.names[row]} {self.table.notes[row]}".lower()))
+
+    def add(self, row):
+        for word in self.words(row):
+            rows = self.postings.get(word)
+            if rows is None:
+                rows = self.postings[word] = set()
+                self.vocabulary.insert(bisect_left(self.vocabulary, word), word)
+            rows.add(row)
+        self.prefix_cache = {}
+
+    def add_many(self, rows):
+        for row in rows:
+            for word in self.words(row):
+                self.postings.setdefault(word, set()).add(row)
+        self.vocabulary = sorted(self.postings)
+        self.prefix_cache = {}
+
+    def remove(self, row):
+        for word in self.words(row):
+            rows = self.postings.get(word)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self.postings[word]
+                    del self.vocabulary[bisect_left(self.vocabulary, word)]
+        self.prefix_cache = {}
+
+    def prefix(self, text):
+        rows = self.prefix_cache.get(text)
+        if rows is None:
+            rows = set()
+            pos = bisect_left(self.vocabulary, text)
+            while pos < len(self.vocabulary) and self.vocabulary[pos].startswith(text):
+                rows |= self.postings[self.vocabulary[pos]]
+                pos += 1
+            self.prefix_cache[text] = rows
+        return rows
+
+    def search(self, query):
+        # Rows matching every word of the query, or None for an empty query
+        terms = self.WORD.findall(query.lower())
+        if not terms:
+            return None
+        matches = sorted((self.prefix(term) for term in terms), key=len)
+        if len(matches) == 1:
+            return matches[0]  # cached set: callers only read it
+        return matches[0].intersection(*matches[1:])
+
+
+class ExpenseImporter:
+    """Streams a bank/e-wallet statement CSV into an ExpenseTable.
+
+    Rows are read and validated in batches; good rows go straight into the
+    table and are written to a staging file, bad rows go to a side report
+    (<csv>.rejected.csv) with the reason. Nothing is held per row apart from
+    the table columns, so very large statements import in bounded memory.
+    Credits (refunds, salary) are not spending and are rejected as well;
+    spending_sign is -1 for statements that list spending as negative amounts.
+    """
+
+    # Header names tried for each Expense field when no explicit mapping is given
+    HEADERS = {
+        "date": ("date", "transaction date", "posting date", "txn date"),
+        "name": ("description", "name", "details", "merchant", "transaction"),
+        "amount": ("amount", "debit", "amount (rm)", "value"),
+        "category": ("category",),
+        "account": ("account",),
+        "note": ("note", "notes", "reference", "remarks"),
+    }
+
+    def __init__(self, table, columns=None, date_formats=("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"),
+                 default_category="Other", default_account="Bank", batch_size=5000, spending_sign=1):
+        self.table = table
+        self.columns = columns or {}   # field -> CSV header, overrides HEADERS
+        self.date_formats = date_formats
+        self.default_category = default_category
+        self.default_account = default_account
+        self.batch_size = batch_size
+        self.spending_sign = spending_sign
+
+    def map_header(self, header):
+        lowered = [h.strip().lower() for h in header]
+        positions = {}
+        for field, candidates in self.HEADERS.items():
+            if field in self.columns:
+                candidates = (self.columns[field].strip().lower(),)
+            for name in candidates:
+                if name in lowered:
+                    positions[field] = lowered.index(name)
+                    break
+        for field in ("date", "name", "amount"):
+            if field not in positions:
+                raise ValueError(f"CSV has no column for '{field}'")
+        return positions
+
+    def parse_date(self, text):
+        for fmt in self.date_formats:
+            try:
+                return datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+        return None
+
+    def validate_batch(self, batch, positions):
+        # Returns (accepted field tuples, rejected (csv row, reason) pairs)
+        accepted, rejected = [], []
+        for raw in batch:
+            field = {f: ExpenseTable.clean(raw[i]) if i < len(raw) else ""
+                     for f, i in positions.items()}
+            date_str = self.parse_date(field["date"])
+            if date_str is None:
+                rejected.append((raw, "bad date"))
+                continue
+            if not field["name"]:
+                rejected.append((raw, "empty name"))
+                continue
+            try:
+                amount = float(field["amount"].replace("RM", "").replace(",", "")) * self.spending_sign
+            except ValueError:
+                rejected.append((raw, "bad amount"))
+                continue
+            # same limits as ExpenseTable.append_fields, so a batch never fails half way
+            if not math.isfinite(amount) or round(abs(amount) * 100) > ExpenseTable.MAX_CENTS:
+                rejected.append((raw, "bad amount"))
+                continue
+            if amount < 0:
+                rejected.append((raw, "credit"))
+                continue
+            if round(amount * 100) == 0:
+                rejected.append((raw, "zero amount"))
+                continue
+            category = field.get("category") or self.default_category
+            account = field.get("account") or self.default_account
+            # same rule as the form: bills are fixed, everything else variable
+            kind = 1 if category == "Bills" else 2
+            accepted.append((kind, date_str, field["name"], amount, category, account, field.get("note", "")))
+        return accepted, rejected
+
+    def run(self, csv_path, staged_path):
+        # Returns (first new row, imported count, rejected count, reject report path)
+        first_row = len(self.table.alive)
+        imported = rejected_count = 0
+        reject_path = csv_path + ".rejected.csv"
+        completed = False
+        try:
+            with open(csv_path, newline="", encoding="utf-8-sig") as src, \
+                    open(staged_path, "w") as staged, \
+                    open(reject_path, "w", newline="") as rejects:
+                reader = csv.reader(src)
+                reject_writer = csv.writer(rejects)
+                header = next(reader, None)
+                if header is None:
+                    return first_row, 0, 0, None
+                positions = self.map_header(header)
+                reject_writer.writerow(header + ["reason"])
+                batch = []
+                for raw in reader:
+                    if not raw:
+                        continue
+                    batch.append(raw)
+                    if len(batch) >= self.batch_size:
+                        imported, rejected_count = self.commit_batch(batch, positions, staged, reject_writer,
+                                                                     imported, rejected_count)
+                        batch = []
+                imported, rejected_count = self.commit_batch(batch, positions, staged, reject_writer,
+                                                             imported, rejected_count)
+            completed = True
+        finally:
+            # Only a finished import with rejects leaves a report behind
+            if not (completed and rejected_count) and os.path.exists(reject_path):
+                os.remove(reject_path)
+        return first_row, imported, rejected_count, reject_path if rejected_count else None
+
+    def commit_batch(self, batch, positions, staged, reject_writer, imported, rejected_count):
+        accepted, rejected = self.validate_batch(batch, positions)
+        lines = []
+        for fields in accepted:
+            row = self.table.append_fields(*fields)
+            lines.append(self.table.view(row).to_file_format())
+        staged.writelines(lines)
+        reject_writer.writerows(raw + [reason] for raw, reason in rejected)
+        return imported + len(accepted), rejected_count + len(rejected)
+
+
 class SortableTreeview(ttk.Treeview):
     def __init__(self, parent, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
-
-    def make_sortable(self):
+        # Virtual mode: only a small pool of items exists in Tk and is repainted
+        # with whichever rows are in the scroll window
+        self.virtual_rows = None    # row keys in display order
+        self.render_row = None      # key -> (values, tags)
+        self.offset = 0             # position of the first painted row
+        self.buffer = 5             # extra rows painted below the visible page
+        self.slots = []             # pooled item ids
+        self.slot_keys = {}         # item id -> row key currently painted into it
+        self.shown = 0              # slots currently attached
+        self.selected_key = None
+        self.scrollbar = None
+        self.base_rows = []         # virtual rows in the order they were given
+        self.sort_keys = {}         # column -> function(row key) giving a typed sort value
+        self.sort_spec = []         # [(column, reverse), ...] most significant first
+        self.sort_cache = {}        # tuple(sort_spec) -> sorted virtual rows
+
+    def make_sortable(self, sort_keys=None):
+        self.sort_keys = sort_keys or {}
         for col in self["columns"]:
-            self.heading(col, text=col, command=lambda c=col: self.sort_treeview(c, False))
+            self.heading(col, text=col, command=lambda c=col: self.sort_treeview(c))
+        # Shift+click on a heading adds it as a secondary sort column
+        self.bind("<Shift-Button-1>", self.add_sort_column)
+
+    def make_virtual(self, render_row, scrollbar=None):
+        self.render_row = render_row
+        self.virtual_rows = []
+        self.scrollbar = scrollbar
+        if scrollbar is not None:
+            scrollbar.configure(command=self.virtual_yview)
+        self.bind("<MouseWheel>", lambda e: self.scroll_rows(-1 if e.delta > 0 else 1, "units"))
+        self.bind("<Button-4>", lambda e: self.scroll_rows(-1, "units"))
+        self.bind("<Button-5>", lambda e: self.scroll_rows(1, "units"))
+        self.bind("<Configure>", lambda e: self.paint())
+        self.bind("<<TreeviewSelect>>", self.remember_selection)
+
+    def set_virtual_rows(self, keys, ordered=None):
+        # ordered: keys already sorted by the current sort_spec (e.g. by a worker thread)
+        self.base_rows = keys
+        self.virtual_rows = keys
+        self.sort_cache = {}
+        if ordered is not None:
+            self.sort_cache[tuple(self.sort_spec)] = ordered
+        self.offset = 0
+        if self.sort_spec:
+            self.apply_sort()
+        else:
+            self.paint()
 
-    def sort_treeview(self, col, reverse):
-        items = [(self.set(k, col), k) for k in self.get_children('')]
-        # Try numeric (amount), then date, then text
-        def try_parse_date(s):
-            try:
-                return datetime.strptime(s, "%Y-%m-%d")
-            except Exception:
-                return None
+    def page_size(self):
+        row_height = ttk.Style().lookup("Treeview", "rowheight") or 20
+        return max(int(self["height"]), self.winfo_height() // int(row_height))
+
+    def paint(self):
+        if self.virtual_rows is None:
+            return
+        rows = self.virtual_rows
+        page = self.page_size()
+        self.offset = max(0, min(self.offset, len(rows) - page))
+        while len(self.slots) < page + self.buffer:
+            self.slots.append(self.insert('', 'end'))
+
+        count = max(0, min(len(self.slots), len(rows) - self.offset))
+        self.slot_keys = {}
+        for iid, key in zip(self.slots, rows[self.offset:self.offset + count]):
+            values, tags = self.render_row(key)
+            self.item(iid, values=values, tags=tags)
+            self.slot_keys[iid] = key
+        if count != self.shown:
+            self.set_children('', *self.slots[:count])
+            self.shown = count
+
+        # Keep the selection on the same row while it is painted
+        selected = [iid for iid, key in self.slot_keys.items() if key == self.selected_key]
+        self.selection_set(selected)
+
+        if self.scrollbar is not None:
+            if rows:
+                self.scrollbar.set(self.offset / len(rows), min(1.0, (self.offset + page) / len(rows)))
+            else:
+                self.scrollbar.set(0.0, 1.0)
+
+    def remember_selection(self, event=None):
+        selected = self.selection()
+        if selected:
+            self.selected_key = self.slot_keys.get(selected[0])
+
+    def scroll_rows(self, amount, what):
+        step = self.page_size() if what == "pages" else 1
+        self.offset += int(amount) * step
+        self.paint()
+        return "break"
+
+    def virtual_yview(self, *args):
+        # Scrollbar callback: ("moveto", fraction) or ("scroll", n, "units"/"pages")
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.virtual_rows))
+            self.paint()
+        elif args[0] == "scroll":
+            self.scroll_rows(args[1], args[2])
+
+    def add_sort_column(self, event):
+        if self.identify_region(event.x, event.y) != "heading":
+            return
+        col = self.column(self.identify_column(event.x), "id")
+        self.sort_treeview(col, add=True)
+        return "break"
+
+    def sort_treeview(self, col, reverse=None, add=False):
+        # Clicking a sorted column again flips its direction
+        current = dict(self.sort_spec)
+        if reverse is None:
+            reverse = not current[col] if col in current else False
+        if add and col in current:
+            self.sort_spec = [(c, reverse if c == col else r) for c, r in self.sort_spec]
+        elif add:
+            self.sort_spec = self.sort_spec + [(col, reverse)]
+        else:
+            self.sort_spec = [(col, reverse)]
+
+        for c in self["columns"]:
+            arrow = {False: " \u25b2", True: " \u25bc"}.get(dict(self.sort_spec).get(c), "")
+            self.heading(c, text=c + arrow)
+        self.apply_sort()
+
+    def apply_sort(self):
+        spec = tuple(self.sort_spec)
+        if self.virtual_rows is not None:
+            ordered = self.sort_cache.get(spec)
+            if ordered is None:
+                ordered = self.sorted_rows(self.base_rows, spec)
+                self.sort_cache[spec] = ordered
+            self.virtual_rows = ordered
+            self.paint()
+        else:
+            children = list(self.get_children(''))
+            for col, reverse in reversed(spec):
+                children.sort(key=self.column_key(col), reverse=reverse)
+            # Reorder the whole view in one call
+            self.set_children('', *children)
+
+    def sorted_rows(self, keys, spec):
+        # Touches no Tk state when every column has a typed key, so it can run off the UI thread
+        ordered = list(keys)
+        # Stable sorts from the least to the most significant column
+        for col, reverse in reversed(spec):
+            ordered.sort(key=self.column_key(col), reverse=reverse)
+        return ordered
+
+    def column_key(self, col):
+        if col in self.sort_keys:
+            return self.sort_keys[col]
+        # No typed key for this column: fall back to parsing the displayed text
+        col_index = list(self["columns"]).index(col)
+        if self.virtual_rows is not None:
+            return lambda k: self.display_sort_value(self.render_row(k)[0][col_index])
+        return lambda k: self.display_sort_value(self.set(k, col))
+
+    def display_sort_value(self, text):
+        # Numbers (amount column may have an "RM" prefix), then dates, then text
+        try:
+            return (0, float(str(text).replace("RM", "").strip()), "")
+        except ValueError:
+            pass
+        try:
+            return (1, datetime.strptime(text, "%Y-%m-%d").toordinal(), "")
+        except (ValueError, TypeError):
+            return (2, 0, str(text))
+
+
+class ExpenseLedger:
+    """Expenses, indexes, budgets and files behind ExpenseTracker.
+
+    Needs no display: the Tk window and the command line (see main) both
+    work through it. Windows in one process share a ledger via shared() and
+    hear about changes through subscribe(); a second process that finds the
+    ledger locked opens it read-only.
+    """
+
+    shared_ledgers = {}  # absolute expenses path -> ExpenseLedger
+
+    @classmethod
+    def shared(cls, file_path="expenses.txt", budgets_file="budgets.txt"):
+        key = os.path.abspath(file_path)
+        if key not in cls.shared_ledgers:
+            cls.shared_ledgers[key] = cls(file_path, budgets_file)
+        return cls.shared_ledgers[key]
+
+    def __init__(self, file_path="expenses.txt", budgets_file="budgets.txt", read_only=False):
+        self.file_path = file_path
+        self.snapshot_path = self.file_path + ".snap"  # parsed binary copy for fast startup
+        self.budgets_file = budgets_file
+        self.listeners = []  # callback(event, detail) for "add", "delete", "import" and "budget"
+        self.search_index = None  # built on the first search, then kept up to date
+        self.search_removed = None  # rows removed while that first build runs
+        self.table_generation = 0  # bumped when rows are truncated away, so a running build restarts
+        self.lock = threading.RLock()  # guards the indexes against background readers
+        self.lock_file = None
+        # read_only: never lock or write anything (reports); also forced when another process holds the lock
+        self.read_only = read_only or not self.acquire_lock()
+        self.expenses = ExpenseTable()
+        self.index = ExpenseIndex(self.expenses)
+        self.monthly_budgets = {}  # Store budget for each month-year like "2024-08"
+        self.category_budgets = {}  # ("2024-08", category) -> budget
+
+        # Journal mode: every save appends one record to expenses.txt and a
+        # background compaction rewrites it (sorted by date) every so often
+        self.journal_lock = threading.Lock()
+        self.journal_appends = 0      # records appended since the last compaction
+        self.compact_every = 1000     # compact after this many appended records
+        self.journal_tail = None      # records appended while a compaction is running
+        self.journal_generation = 0   # bumped by full rewrites so stale compactions are dropped
+        self.torn_tail = False        # expenses.txt ends in a half-written line (crash while saving)
 
+        # Load existing data
+        self.load_expenses()
+        self.load_budgets()
+        self.spending = SpendingLedger(self.index)
+        self.trends = SpendingTrends(self.index)  # dashboard series
+
+    def acquire_lock(self):
+        # Only one process may write the ledger files at a time
+        try:
+            self.lock_file = open(self.file_path + ".lock", "a+")
+            self.lock_file.seek(0)
+            if fcntl is not None:
+                fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def check_writable(self):
+        if self.read_only:
+            raise PermissionError(f"{self.file_path} is open in another Expense Tracker")
+
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def notify(self, event, detail):
+        for callback in list(self.listeners):
+            callback(event, detail)
+
+    def add_expense(self, expense):
+        self.check_writable()
+        with self.lock:
+            row = self.expenses.append(expense)
+            self.index.add(row)
+            self.spending.add(row)
+            self.trends.add(row)
+            if self.search_index is not None:
+                self.search_index.add(row)
+        self.user_expense_file(self.expenses.view(row))
+        self.notify("add", [row])
+        return row
+
+    def delete_expense(self, expense_id):
+        self.check_writable()
+        row = self.expenses.get_row(expense_id)
+        if not self.remove_expense(expense_id):
+            return False
+        # Tombstone record instead of rewriting the file
+        self.append_journal([f"DELETE|{expense_id}\n"])
+        self.notify("delete", [row])
+        return True
+
+    def import_csv(self, csv_path, default_account="Bank", spending_sign=1):
+        # Returns (imported, rejected, reject report path); raises on unreadable files
+        self.check_writable()
+        importer = ExpenseImporter(self.expenses, default_account=default_account, spending_sign=spending_sign)
+        staged_path = self.file_path + ".import"
+        first_row = len(self.expenses.alive)
         try:
-            # amount column contains "RM" prefix sometimes
-            items.sort(key=lambda t: float(t[0].replace("RM", "").strip()), reverse=reverse)
+            first_row, imported, rejected, reject_path = importer.run(csv_path, staged_path)
+            # One journal write and one index update for the whole file
+            self.append_journal_file(staged_path, imported)
         except Exception:
-            # try date
-            dates = [try_parse_date(t[0]) for t in items]
-            if all(d is not None for d in dates):
-                items.sort(key=lambda t: datetime.strptime(t[0], "%Y-%m-%d"), reverse=reverse)
+            # Nothing of a failed import may stay in the table: the next save would write it out
+            with self.lock:
+                self.expenses.truncate(first_row)
+                self.search_index = None
+                self.table_generation += 1
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+            raise
+        with self.lock:
+            self.index.add_many(range(first_row, first_row + imported))
+            self.spending.clear()
+            self.trends.clear()
+            if self.search_index is not None:
+                self.search_index.add_many(range(first_row, first_row + imported))
+        self.notify("import", range(first_row, first_row + imported))
+        return imported, rejected, reject_path
+
+    def set_budget(self, month_key, amount, category=None):
+        self.check_writable()
+        if category is None:
+            self.monthly_budgets[month_key] = amount
+        else:
+            self.category_budgets[(month_key, category)] = amount
+        self.save_all_budgets()
+        self.notify("budget", month_key)
+
+    def filter_rows(self, year=None, month=None, category=None):
+        # Matching rows, newest first
+        with self.lock:
+            rows = self.index.query(year, month, category)
+        rows.sort(key=self.expenses.dates.__getitem__, reverse=True)
+        return rows
+
+    def date_rows(self, start, end, category=None):
+        # Rows dated start..end inclusive ("YYYY-MM-DD"), oldest first
+        with self.lock:
+            rows = self.index.date_range(start, end)
+        if category is not None:
+            code = self.expenses.category_codes.get(category)
+            categories = self.expenses.categories
+            rows = [row for row in rows if categories[row] == code]
+        return rows
+
+    def search(self, query, category=None):
+        # Rows anywhere in the ledger whose name or note matches the query, newest
+        # first; None for an empty query
+        with self.lock:
+            index = self.search_index
+        while index is None:
+            index = self.build_search_index()
+        with self.lock:
+            matches = index.search(query)
+            if matches is None:
+                return None
+            if category is None:
+                rows = list(matches)
             else:
-                items.sort(key=lambda t: t[0], reverse=reverse)
+                code = self.expenses.category_codes.get(category)
+                categories = self.expenses.categories
+                rows = [row for row in matches if categories[row] == code]
+        rows.sort(key=self.expenses.dates.__getitem__, reverse=True)
+        return rows
+
+    def build_search_index(self):
+        # The full build (seconds on a big ledger) runs without the lock so saves on
+        # the Tk thread don't wait for it; rows added or removed meanwhile are applied
+        # before it is swapped in. Returns None if an import was rolled back meanwhile.
+        with self.lock:
+            alive = bytes(self.expenses.alive)
+            generation = self.table_generation
+            self.search_removed = []
+        index = SearchIndex(self.expenses)
+        try:
+            index.add_many(row for row in range(len(alive)) if alive[row])
+        except IndexError:
+            pass  # the table shrank under us; the generation check below catches it
+        with self.lock:
+            removed, self.search_removed = self.search_removed, None
+            if generation != self.table_generation:
+                return None
+            for row in removed:
+                if row < len(alive) and alive[row]:
+                    index.remove(row)
+            current = self.expenses.alive
+            for row in range(len(alive), len(current)):
+                if current[row]:
+                    index.add(row)
+            self.search_index = index
+        return index
+
+    def total(self, rows):
+        return sum(self.expenses.amounts[row] for row in rows) / 100
+
+    def category_totals(self, rows):
+        totals = {}
+        for row in rows:
+            category = self.expenses.category_names[self.expenses.categories[row]]
+            totals[category] = totals.get(category, 0) + self.expenses.amounts[row]
+        return {category: cents / 100 for category, cents in totals.items()}
+
+    def budget_status(self, month_key, category=None):
+        # (label, budget, remaining) for "YYYY-MM", or None when no budget is set.
+        # A category budget is used when one exists for the filtered category.
+        budget = self.category_budgets.get((month_key, category), 0)
+        if budget > 0:
+            label = f"{category} budget"
+        else:
+            category, label = None, "Budget"
+            budget = self.monthly_budgets.get(month_key, 0)
+        if budget <= 0:
+            return None
+        try:
+            year, month = month_key.split("-")
+            # may cut a month bucket in the index, which the summary worker also does
+            with self.lock:
+                spent = self.spending.spent(int(year), int(month), category)
+        except ValueError:
+            spent = 0
+        return label, budget, budget - spent
+
+    def load_expenses(self):
+        # Start from the binary snapshot when it still matches expenses.txt,
+        # replaying only what was appended since; otherwise replay everything
+        offset = self.load_snapshot()
+        if offset is None:
+            self.torn_tail = self.ends_mid_line()
+            return
+        self.replay_journal(offset)
+        if self.expenses.generated_ids and not self.read_only:
+            # Old lines had no ids: write them out once so the ids persist
+            self.save_all_expenses()
+            self.expenses.generated_ids = 0
+        self.save_snapshot()
+
+    def replay_journal(self, offset):
+        # Replay the journal in order; a torn last line from a crash is skipped
+        # and remembered, so the next append starts on a fresh line
+        first_row = len(self.expenses.alive)
+        try:
+            with open(self.file_path, 'r') as f:
+                f.seek(offset)
+                for line in f:
+                    self.torn_tail = not line.endswith("\n")
+                    line = line.strip()
+                    if line:
+                        try:
+                            if line.startswith("DELETE|"):
+                                row = self.expenses.get_row(int(line[7:]))
+                                if row is not None:
+                                    if row < first_row:
+                                        self.index.remove(row)
+                                    self.expenses.remove(self.expenses.view(row))
+                            else:
+                                self.expenses.append_line(line)
+                        except ValueError:
+                            continue
+        except FileNotFoundError:
+            return
+        alive = self.expenses.alive
+        self.index.add_many(row for row in range(first_row, len(alive)) if alive[row])
+
+    def ends_mid_line(self):
+        try:
+            with open(self.file_path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return False
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b"\n"
+        except FileNotFoundError:
+            return False
+
+    def text_signature(self):
+        # (size, mtime in ns, crc of the last 4 KiB) of expenses.txt
+        stat = os.stat(self.file_path)
+        with open(self.file_path, "rb") as f:
+            f.seek(max(0, stat.st_size - 4096))
+            tail_crc = zlib.crc32(f.read(4096))
+        return stat.st_size, stat.st_mtime_ns, tail_crc
+
+    def load_snapshot(self):
+        # Returns the byte offset to replay expenses.txt from, or None if it
+        # matches the snapshot exactly and there is nothing left to do
+        if not os.path.exists(self.file_path):
+            return 0
+        loaded = ExpenseTable.read_snapshot(self.snapshot_path)
+        if loaded is None:
+            return 0
+        table, ordinals, rows, (text_size, text_mtime_ns, tail_crc) = loaded
+        size, mtime_ns, _ = self.text_signature()
+        if (size, mtime_ns) != (text_size, text_mtime_ns):
+            # Only appended to since the snapshot? Then its old tail is unchanged
+            if size < text_size:
+                return 0
+            with open(self.file_path, "rb") as f:
+                f.seek(max(0, text_size - 4096))
+                if zlib.crc32(f.read(text_size - max(0, text_size - 4096))) != tail_crc:
+                    return 0
+        self.expenses = table
+        self.index = ExpenseIndex(table)
+        self.index.load_order(ordinals, rows)
+        return None if size == text_size and mtime_ns == text_mtime_ns else text_size
+
+    def save_snapshot(self):
+        if self.read_only:
+            return
+        try:
+            with self.journal_lock:
+                size, mtime_ns, tail_crc = self.text_signature()
+                self.expenses.write_snapshot(self.snapshot_path, self.index.ordinals, self.index.by_ordinal,
+                                             size, mtime_ns, tail_crc)
+        except OSError:
+            pass
+
+    def load_budgets(self):
+        try:
+            with open(self.budgets_file, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        parts = line.split('|')
+                        if len(parts) == 3:
+                            month_year, category, budget_amount = parts
+                            self.category_budgets[(month_year, category)] = float(budget_amount)
+                        else:
+                            month_year, budget_amount = parts
+                            self.monthly_budgets[month_year] = float(budget_amount)
+        except FileNotFoundError:
+            pass
+
+    def remove_expense(self, expense_id):
+        row = self.expenses.get_row(expense_id)
+        if row is None:
+            return False
+        with self.lock:
+            self.index.remove(row)
+            self.spending.remove(row)
+            self.trends.remove(row)
+            if self.search_index is not None:
+                self.search_index.remove(row)
+            elif self.search_removed is not None:
+                self.search_removed.append(row)
+            self.expenses.remove(self.expenses.view(row))
+        return True
+
+    def get_date_from_expense(self, expense_line):
+        parts = expense_line.strip().split("|")
+        if parts[0] in ("FIXED", "VARIABLE"):
+            return parts[1]
+        return parts[0]
+
+    def user_expense_file(self, expense):
+        # Append-only: one record per save instead of read-sort-rewrite
+        self.append_journal([expense.to_file_format()])
+
+    def append_journal(self, lines):
+        with self.journal_lock:
+            with open(self.file_path, "a") as f:
+                if self.torn_tail:
+                    f.write("\n")  # keep the new record off the broken line
+                    self.torn_tail = False
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            if self.journal_tail is not None:
+                self.journal_tail.extend(lines)
+            self.journal_appends += len(lines)
+            due = self.journal_appends >= self.compact_every and self.journal_tail is None
+            if due:
+                self.journal_tail = []
+                generation = self.journal_generation
+        if due:
+            snapshot = list(self.expenses)
+            threading.Thread(target=self.compact_journal, args=(snapshot, generation), daemon=True).start()
+
+    def append_journal_file(self, staged_path, count):
+        # Bulk version of append_journal: copy a staged file onto the journal
+        with self.journal_lock:
+            with open(staged_path, "r") as src, open(self.file_path, "a") as f:
+                if self.torn_tail:
+                    f.write("\n")
+                    self.torn_tail = False
+                shutil.copyfileobj(src, f)
+                f.flush()
+                os.fsync(f.fileno())
+            # a running compaction would have to carry all of this over; drop it
+            self.journal_generation += 1
+            self.journal_appends += count
+        os.remove(staged_path)
+
+    def compact_journal(self, snapshot, generation):
+        # Runs in the background: write the sorted snapshot to a temp file, then
+        # under the lock add whatever was journaled meanwhile and swap it in
+        tmp_path = self.file_path + ".tmp"
+        try:
+            lines = sorted((e.to_file_format() for e in snapshot), key=self.get_date_from_expense)
+            with open(tmp_path, "w") as f:
+                f.writelines(lines)
+            with self.journal_lock:
+                if generation != self.journal_generation:
+                    os.remove(tmp_path)
+                    return
+                with open(tmp_path, "a") as f:
+                    f.writelines(self.journal_tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.file_path)
+                self.journal_appends = len(self.journal_tail)
+                self.torn_tail = False
+        except OSError:
+            pass
+        finally:
+            with self.journal_lock:
+                self.journal_tail = None
 
-        for index, (val, k) in enumerate(items):
-            self.move(k, '', index)
-        self.heading(col, command=lambda: self.sort_treeview(col, not reverse))
+    def save_all_expenses(self):
+        lines = sorted((e.to_file_format() for e in self.expenses), key=self.get_date_from_expense)
+        tmp_path = self.file_path + ".tmp"
+        with self.journal_lock:
+            with open(tmp_path, "w") as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.file_path)
+            self.journal_generation += 1
+            self.journal_appends = 0
+            self.torn_tail = False
+
+    def save_all_budgets(self):
+        with open(self.budgets_file, "w") as f:
+            for month_year, budget_amount in self.monthly_budgets.items():
+                f.write(f"{month_year}|{budget_amount}\n")
+            for (month_year, category), budget_amount in self.category_budgets.items():
+                f.write(f"{month_year}|{category}|{budget_amount}\n")
 
 
 class ExpenseTracker:
-    def __init__(self, parent_window=None):
+    def __init__(self, parent_window=None, ledger=None):
         if parent_window is None:
             self.window = Tk()
             self.is_standalone = True
@@ -144,14 +1491,7 @@ class ExpenseTracker:
             self.window = Toplevel(parent_window)
             self.is_standalone = False
         self.window.title("Expense Tracker")
-        self.file_path = "expenses.txt"
-        self.budgets_file = "budgets.txt"
-        self.expenses = []
-        self.monthly_budgets = {}  # Store budget for each month-year like "2024-08"
-
-        # Load existing data
-        self.load_expenses()
-        self.load_budgets()
+        self.ledger = ledger if ledger is not None else ExpenseLedger.shared()
 
         # StringVar
         self.date = StringVar(value=datetime.now().strftime("%Y-%m-%d"))
@@ -207,6 +1547,8 @@ class ExpenseTracker:
         # Save Button
         save_exp = Button(frame1, text="Save Expense", command=self.save_expense, bg="green", fg="white")
         save_exp.grid(row=6, columnspan=2, pady=10)
+        import_exp = Button(frame1, text="Import CSV", command=self.import_csv, bg="purple", fg="white")
+        import_exp.grid(row=8, columnspan=2, pady=10)
 
         # Budget setting
         label_budget = Label(frame1, text="Monthly Budget:")
@@ -239,10 +1581,17 @@ class ExpenseTracker:
         option4 = OptionMenu(frame2, self.filter_category, *filter_categories)
         option4.grid(row=2, column=1, sticky=W, padx=5)
 
+        label_search = Label(frame2, text="Search:")
+        label_search.grid(row=3, column=0, sticky=W, pady=5)
+        self.search_text = StringVar()
+        entry_search = Entry(frame2, textvariable=self.search_text, width=20)
+        entry_search.grid(row=3, column=1, sticky=W, padx=5)
+
         buttons_frame = Frame(frame2)
-        buttons_frame.grid(row=3, columnspan=2, pady=10)
+        buttons_frame.grid(row=4, columnspan=2, pady=10)
         Button(buttons_frame, text="Summarize Expenses", command=self.summarize_expenses, bg="blue", fg="white").pack(side=LEFT, padx=5)
         Button(buttons_frame, text="Delete Selected", command=self.delete_expense, bg="red", fg="white").pack(side=LEFT, padx=5)
+        Button(buttons_frame, text="Dashboard", command=lambda: ExpenseDashboard(self.window, self.ledger), bg="teal", fg="white").pack(side=LEFT, padx=5)
 
         # Right frame for summary
         frame3 = Frame(self.window)
@@ -250,21 +1599,29 @@ class ExpenseTracker:
 
         Label(frame3, text="Expense Summary:", font=("Arial", 12, "bold")).pack(pady=5)
 
+        table_frame = Frame(frame3)
+        table_frame.pack(fill=BOTH, expand=True, pady=5)
+        table_scrollbar = ttk.Scrollbar(table_frame, orient=VERTICAL)
+        table_scrollbar.pack(side=RIGHT, fill=Y)
         self.summary_table = SortableTreeview(
-            frame3,
+            table_frame,
             columns=("Date", "Expense Name", "Amount", "Category", "Account", "Note"),
             show="headings",
             height=15
         )
-        self.summary_table.make_sortable()
-        self.summary_table.pack(fill=BOTH, expand=True, pady=5)
+        self.summary_table.make_sortable({
+            "Date": lambda row: self.ledger.expenses.dates[row],
+            "Expense Name": lambda row: self.ledger.expenses.names[row],
+            "Amount": lambda row: self.ledger.expenses.amounts[row],
+            "Category": lambda row: self.ledger.expenses.category_names[self.ledger.expenses.categories[row]],
+            "Account": lambda row: self.ledger.expenses.account_names[self.ledger.expenses.accounts[row]],
+            "Note": lambda row: self.ledger.expenses.notes[row],
+        })
+        self.summary_table.make_virtual(self.render_expense_row, table_scrollbar)
+        self.summary_table.pack(side=LEFT, fill=BOTH, expand=True)
         self.summary_table.tag_configure("fixed", foreground="blue")
         self.summary_table.tag_configure("variable", foreground="green")
 
-        for col in ("Date", "Expense Name", "Amount", "Category", "Account", "Note"):
-            # make sortable (heading command will be overwritten by make_sortable but harmless)
-            self.summary_table.heading(col, text=col, command=lambda c=col: self.sort_treeview(c, False))
-
         self.summary_table.column("Date", width=100, anchor="center")
         self.summary_table.column("Expense Name", width=150, anchor="center")
         self.summary_table.column("Amount", width=80, anchor="center")
@@ -279,45 +1636,69 @@ class ExpenseTracker:
         self.budget_label = Label(summary_info_frame, text="Budget status will appear here.", fg="green")
         self.budget_label.pack(side=RIGHT, padx=10)
 
-        self.summarize_expenses(show_popup=False)
-
-        self.window.mainloop()
-
-    def load_expenses(self):
-        try:
-            with open(self.file_path, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        parts = line.split('|')
-                        if parts[0] == "FIXED":
-                            _, date, name, amount, category, account, *note = parts
-                            note = note[0] if note else ""
-                            self.expenses.append(FixedExpense(date, name, float(amount), category, account, note))
-                        elif parts[0] == "VARIABLE":
-                            _, date, name, amount, category, account, *note = parts
-                            note = note[0] if note else ""
-                            self.expenses.append(VariableExpense(date, name, float(amount), category, account, note))
-                        else:
-                            # backward compatibility (old lines without marker)
-                            date, name, amount, category, account = parts[:5]
-                            note = parts[5] if len(parts) > 5 else ""
-                            self.expenses.append(Expense(date, name, float(amount), category, account, note))
-        except FileNotFoundError:
-            pass
+        # Filtering and totals run on a worker thread; results come back
+        # through a queue that the Tk thread polls with after()
+        self.summary_generation = 0  # bumped by every request, older results are dropped
+        self.summary_after = None    # pending debounced request
+        self.summary_poll = None     # pending poll for results
+        self.summary_jobs = queue.Queue()
+        self.summary_results = queue.Queue()
+        threading.Thread(target=self.summary_worker, daemon=True).start()
+        # Filter as you type or pick
+        for var in (self.search_text, self.filter_year, self.filter_month, self.filter_category):
+            var.trace_add("write", self.request_summary)
 
-    def load_budgets(self):
-        try:
-            with open(self.budgets_file, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        month_year, budget_amount = line.split('|')
-                        self.monthly_budgets[month_year] = float(budget_amount)
-        except FileNotFoundError:
-            pass
+        self.summarize_expenses(show_popup=False)
+        self.window.protocol("WM_DELETE_WINDOW", self.close_window)
+        # Other windows on the same ledger report their changes here
+        self.ledger.subscribe(self.on_ledger_change)
+        self.window.bind("<Destroy>", self.on_destroy)
+        if self.ledger.read_only:
+            tkinter.messagebox.showwarning(
+                "Read Only", "Another Expense Tracker is using these files.\nThis window can view but not save changes.",
+                parent=self.window)
+
+        if self.is_standalone:
+            self.window.mainloop()
+
+    def close_window(self):
+        # Leave an up-to-date snapshot behind so the next start skips parsing
+        self.ledger.unsubscribe(self.on_ledger_change)
+        self.ledger.save_snapshot()
+        self.window.destroy()
+
+    def on_destroy(self, event):
+        if event.widget is not self.window:
+            return
+        self.ledger.unsubscribe(self.on_ledger_change)
+        for after_id in (self.summary_after, self.summary_poll):
+            if after_id is not None:
+                self.window.after_cancel(after_id)
+        self.summary_generation += 1
+        self.summary_jobs.put(None)  # stops the worker
+
+    def on_ledger_change(self, event, detail):
+        # Refresh only when the change touches what this window shows
+        if event == "budget":
+            if detail == f"{self.filter_year.get()}-{self.filter_month.get()}":
+                self.update_budget_label()
+        elif event == "import" or any(self.shows_row(row) for row in detail):
+            self.request_summary()
+
+    def shows_row(self, row):
+        d = date.fromordinal(self.ledger.expenses.dates[row])
+        year, month = self.filter_year.get(), self.filter_month.get()
+        return (not year or year == str(d.year)) and (not month or month == f"{d.month:02d}")
+
+    def writable(self):
+        if self.ledger.read_only:
+            tkinter.messagebox.showerror("Read Only", "Another Expense Tracker is using these files!")
+            return False
+        return True
 
     def save_expense(self):
+        if not self.writable():
+            return
         if not self.expense.get().strip():
             tkinter.messagebox.showerror("Error", "Please enter an expense name!")
             return
@@ -353,10 +1734,12 @@ class ExpenseTracker:
         else:  # everything else is variable
             expense = VariableExpense(self.date.get(), self.expense.get(), amount, self.category.get(), self.account.get(), note)
 
-        self.expenses.append(expense)
-        self.user_expense_file(expense)
-
-        self.summarize_expenses(show_popup=False)
+        # The ledger notifies every open window, this one included
+        try:
+            self.ledger.add_expense(expense)
+        except ValueError as e:
+            tkinter.messagebox.showerror("Error", str(e))
+            return
 
         self.expense.set("")
         self.amount.set("")
@@ -367,12 +1750,16 @@ class ExpenseTracker:
         tkinter.messagebox.showinfo("Success", "Expense added successfully!")
 
     def delete_expense(self):
+        if not self.writable():
+            return
         selected_item = self.summary_table.selection()
         if not selected_item:
             tkinter.messagebox.showwarning("No Selection", "Please select an expense to delete!")
             return
 
         item_values = self.summary_table.item(selected_item[0], "values")
+        row = self.summary_table.slot_keys.get(selected_item[0])
+        expense_id = self.ledger.expenses.ids[row] if row is not None else None
         confirm = tkinter.messagebox.askyesno(
             "Confirm Delete",
             f"Are you sure you want to delete:\n\n"
@@ -384,77 +1771,126 @@ class ExpenseTracker:
         if not confirm:
             return
 
-        expense_to_remove = None
-        for expense in self.expenses:
-            if (expense.get_date() == item_values[0] and
-                expense.get_name() == item_values[1] and
-                f"RM{expense.get_amount():.2f}" == item_values[2] and
-                expense.get_category() == item_values[3] and
-                expense.get_account() == item_values[4] and
-                expense.get_note() == item_values[5]):
-                expense_to_remove = expense
-                break
-
-        if expense_to_remove:
-            self.expenses.remove(expense_to_remove)
-            self.save_all_expenses()
-            self.summarize_expenses(show_popup=False)
+        if self.ledger.delete_expense(expense_id):
             tkinter.messagebox.showinfo("Success", "Expense deleted successfully!")
         else:
             tkinter.messagebox.showerror("Error", "Could not find the expense to delete!")
 
-    def summarize_expenses(self, show_popup=True):
-        for row in self.summary_table.get_children():
-            self.summary_table.delete(row)
+    def import_csv(self):
+        if not self.writable():
+            return
+        csv_path = tkinter.filedialog.askopenfilename(
+            title="Import bank statement", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not csv_path:
+            return
+        # Statements rarely name the account: use the one picked in the form
+        account = self.account.get() if self.account.get() != "Select account" else "Bank"
+        try:
+            imported, rejected, reject_path = self.ledger.import_csv(csv_path, default_account=account)
+        except (OSError, ValueError, csv.Error) as e:
+            tkinter.messagebox.showerror("Error", f"Import failed: {e}")
+            return
+        message = f"Imported {imported} expenses."
+        if rejected:
+            message += f"\n{rejected} rows were rejected, see:\n{reject_path}"
+        tkinter.messagebox.showinfo("Import CSV", message)
 
-        total_expense = 0
-        filtered_expenses = []
-        for expense in self.expenses:
+    def request_summary(self, *args):
+        # Debounce: a burst of keystrokes or filter changes runs one summary
+        if self.summary_after is not None:
+            self.window.after_cancel(self.summary_after)
+        self.summary_after = self.window.after(200, self.summarize_expenses, False)
+
+    def summarize_expenses(self, show_popup=True):
+        # Hands the work to the worker thread; apply_summary shows the result
+        if self.summary_after is not None:
+            self.window.after_cancel(self.summary_after)
+            self.summary_after = None
+        try:
+            year = int(self.filter_year.get()) if self.filter_year.get() else None
+            month = int(self.filter_month.get()) if self.filter_month.get() else None
+            if year is not None and not MINYEAR <= year <= MAXYEAR:
+                raise ValueError(f"year {year} is out of range")
+            if month is not None and not 1 <= month <= 12:
+                raise ValueError(f"month {month} is out of range")
+            valid = True
+        except ValueError:
+            year = month = None
+            valid = False
+        category = None if self.filter_category.get() == "All" else self.filter_category.get()
+        self.summary_generation += 1
+        self.summary_jobs.put((self.summary_generation, valid, year, month, category, self.search_text.get(),
+                               tuple(self.summary_table.sort_spec), show_popup))
+        if self.summary_poll is None:
+            self.summary_poll = self.window.after(20, self.poll_summary)
+
+    def summary_worker(self):
+        while True:
+            job = self.summary_jobs.get()
+            # Skip straight to the newest request
+            while job is not None and not self.summary_jobs.empty():
+                job = self.summary_jobs.get()
+            if job is None:
+                return
             try:
-                expense_date = datetime.strptime(expense.get_date(), "%Y-%m-%d")
-                if self.filter_year.get() and expense_date.year != int(self.filter_year.get()):
-                    continue
-                if self.filter_month.get() and expense_date.month != int(self.filter_month.get()):
-                    continue
-                if self.filter_category.get() != "All" and expense.get_category() != self.filter_category.get():
-                    continue
-                filtered_expenses.append(expense)
-            except (ValueError, AttributeError):
-                continue
+                result = self.compute_summary(*job)
+            except Exception as e:
+                # Post the error so poll_summary stops waiting and the window keeps working
+                result = (job[0], e)
+            if result is not None:
+                self.summary_results.put(result)
+
+    def compute_summary(self, generation, valid, year, month, category, query, sort_spec, show_popup):
+        # Runs on the worker thread: no Tk calls here. Returns None once a newer request exists.
+        def cancelled():
+            return generation != self.summary_generation
+
+        # A search looks through the whole ledger, not just the filtered month
+        filtered_rows = self.ledger.search(query, category)
+        if filtered_rows is None:
+            filtered_rows = self.ledger.filter_rows(year, month, category) if valid else []
+        if cancelled():
+            return None
+        ordered = None
+        if sort_spec and all(col in self.summary_table.sort_keys for col, reverse in sort_spec):
+            ordered = self.summary_table.sorted_rows(filtered_rows, sort_spec)
+            if cancelled():
+                return None
+        total_expense = self.ledger.total(filtered_rows)
+        category_totals = self.ledger.category_totals(filtered_rows) if show_popup and filtered_rows else None
+        return generation, filtered_rows, ordered, sort_spec, total_expense, category_totals
+
+    def poll_summary(self):
+        # Keep polling until the newest request has been answered
+        result = None
+        while not self.summary_results.empty():
+            result = self.summary_results.get()
+        if result is not None and result[0] == self.summary_generation:
+            self.summary_poll = None
+            if isinstance(result[1], Exception):
+                self.total_label.config(text=f"Summary failed: {result[1]}")
+            else:
+                self.apply_summary(*result[1:])
+        else:
+            self.summary_poll = self.window.after(20, self.poll_summary)
 
-        # sort by date string (YYYY-MM-DD) descending
-        filtered_expenses.sort(key=lambda x: x.get_date(), reverse=True)
-        for expense in filtered_expenses:
-            # Decide tag based on type
-            tag = "fixed" if isinstance(expense, FixedExpense) else "variable"
-            self.summary_table.insert(
-                "", "end",
-                values=(expense.get_date(), expense.get_name(), f"RM{expense.get_amount():.2f}", expense.get_category(), expense.get_account(), expense.get_note()),
-                tags=(tag,)   # apply color tag
-            )
-            total_expense += expense.get_amount()
+    def apply_summary(self, filtered_rows, ordered, sort_spec, total_expense, category_totals):
+        if sort_spec != tuple(self.summary_table.sort_spec):
+            ordered = None  # a heading was clicked meanwhile: sort again here
+        # Only the rows in the scroll window are materialized in the Treeview
+        self.summary_table.set_virtual_rows(filtered_rows, ordered)
 
         month_year = f"{self.filter_month.get()}/{self.filter_year.get()}"
+        if SearchIndex.WORD.search(self.search_text.get()):
+            month_year = f'"{self.search_text.get().strip()}", all dates'
         if self.filter_category.get() != "All":
             self.total_label.config(text=f"Total ({self.filter_category.get()}, {month_year}): RM{total_expense:.2f}")
         else:
             self.total_label.config(text=f"Total ({month_year}): RM{total_expense:.2f}")
 
-        current_month_year = f"{self.filter_year.get()}-{self.filter_month.get()}"
-        monthly_budget = self.monthly_budgets.get(current_month_year, 0)
-        if monthly_budget > 0:
-            remaining = monthly_budget - total_expense
-            if remaining >= 0:
-                self.budget_label.config(text=f"Budget: RM{monthly_budget:.2f} | Remaining: RM{remaining:.2f}", fg="green")
-            else:
-                self.budget_label.config(text=f"Budget: RM{monthly_budget:.2f} | Over by RM{abs(remaining):.2f}", fg="red")
-        else:
-            self.budget_label.config(text=f"No budget set for {month_year}", fg="gray")
+        self.update_budget_label()
 
-        if show_popup and filtered_expenses:
-            category_totals = {}
-            for expense in filtered_expenses:
-                category_totals[expense.get_category()] = category_totals.get(expense.get_category(), 0) + expense.get_amount()
+        if category_totals is not None:
             summary_msg = f"Expense Summary ({month_year}):\n\n"
             for cat, amt in category_totals.items():
                 summary_msg += f"{cat}: RM{amt:.2f}\n"
@@ -462,6 +1898,8 @@ class ExpenseTracker:
             tkinter.messagebox.showinfo("Category Summary", summary_msg)
 
     def set_budget(self):
+        if not self.writable():
+            return
         if not self.budget_var.get().strip():
             tkinter.messagebox.showerror("Error", "Please enter a budget amount!")
             return
@@ -471,71 +1909,237 @@ class ExpenseTracker:
                 tkinter.messagebox.showerror("Error", "Budget must be greater than 0!")
                 return
             current_month_year = f"{self.filter_year.get()}-{self.filter_month.get()}"
-            self.monthly_budgets[current_month_year] = budget_amount
-            self.save_all_budgets()
-            total_expense = 0
-            for expense in self.expenses:
-                try:
-                    expense_date = datetime.strptime(expense.get_date(), "%Y-%m-%d")
-                    if expense_date.year == int(self.filter_year.get()) and expense_date.month == int(self.filter_month.get()):
-                        total_expense += expense.get_amount()
-                except (ValueError, AttributeError):
-                    continue
-            remaining = budget_amount - total_expense
-            if remaining >= 0:
-                self.budget_label.config(text=f"Budget: RM{budget_amount:.2f} | Remaining: RM{remaining:.2f}", fg="green")
+            # With a category filter the budget applies to that category only
+            if self.filter_category.get() != "All":
+                self.ledger.set_budget(current_month_year, budget_amount, self.filter_category.get())
+                current_month_year += f" ({self.filter_category.get()})"
             else:
-                self.budget_label.config(text=f"Budget: RM{budget_amount:.2f} | Over by RM{abs(remaining):.2f}", fg="red")
+                self.ledger.set_budget(current_month_year, budget_amount)
             tkinter.messagebox.showinfo("Budget Set", f"Budget set to RM{budget_amount:.2f} for {current_month_year}")
             self.budget_var.set("")
         except ValueError:
             tkinter.messagebox.showerror("Error", "Budget must be a valid number!")
 
-    def get_date_from_expense(self, expense_line):
-        return expense_line.strip().split("|")[0]
+    def update_budget_label(self):
+        # Budget status straight from the running totals, no rescan
+        month_key = f"{self.filter_year.get()}-{self.filter_month.get()}"
+        month_year = f"{self.filter_month.get()}/{self.filter_year.get()}"
+        status = self.ledger.budget_status(month_key, self.filter_category.get())
+        if status is None:
+            self.budget_label.config(text=f"No budget set for {month_year}", fg="gray")
+            return
+        label, budget, remaining = status
+        if remaining >= 0:
+            self.budget_label.config(text=f"{label}: RM{budget:.2f} | Remaining: RM{remaining:.2f}", fg="green")
+        else:
+            self.budget_label.config(text=f"{label}: RM{budget:.2f} | Over by RM{abs(remaining):.2f}", fg="red")
 
-    def user_expense_file(self, expense):
-        try:
-            with open(self.file_path, "r") as f:
-                expenses = f.readlines()
-        except:
-            expenses = []
-        expenses.append(expense.to_file_format())   # use class method here
-        expenses.sort(key=self.get_date_from_expense)
-        with open(self.file_path, "w") as f:
-            f.writelines(expenses)
+    def render_expense_row(self, row):
+        expense = self.ledger.expenses.view(row)
+        # Decide tag based on type
+        tag = "fixed" if expense.is_fixed() else "variable"
+        values = (expense.get_date(), expense.get_name(), f"RM{expense.get_amount():.2f}",
+                  expense.get_category(), expense.get_account(), expense.get_note())
+        return values, (tag,)
 
-    def save_all_expenses(self):
-        with open(self.file_path, "w") as f:
-            for expense in self.expenses:
-                f.write(expense.to_file_format())   # use class method here
 
-    def save_all_budgets(self):
-        with open(self.budgets_file, "w") as f:
-            for month_year, budget_amount in self.monthly_budgets.items():
-                f.write(f"{month_year}|{budget_amount}\n")
-
-    def sort_treeview(self, col, reverse):
-        # Get all items
-        items = [(self.summary_table.set(k, col), k) for k in self.summary_table.get_children('')]
+class ExpenseDashboard:
+    """Spending per category or account by month, plus daily spending, for a
+    window of time that a slider pans across the ledger.
 
-        # Try to sort as numbers first, otherwise as text
-        try:
-            items.sort(key=lambda t: float(t[0].replace("RM", "")), reverse=reverse)
-        except ValueError:
-            # fallback to date-aware sort if column holds dates
-            try:
-                items.sort(key=lambda t: datetime.strptime(t[0], "%Y-%m-%d"), reverse=reverse)
-            except Exception:
-                items.sort(key=lambda t: t[0], reverse=reverse)
+    The figure is built once; panning and ledger changes only swap the line
+    data and ask for an idle redraw.
+    """
 
-        # Rearrange items in sorted order
-        for index, (val, k) in enumerate(items):
-            self.summary_table.move(k, '', index)
+    SPANS = {"3 months": 91, "1 year": 365, "2 years": 730, "5 years": 1826}
+    POINTS = 300  # most points drawn for the daily series
 
-        # Reverse sort next time
-        self.summary_table.heading(col, command=lambda: self.sort_treeview(col, not reverse))
+    def __init__(self, parent_window, ledger):
+        # matplotlib is only needed here, so it is only imported here
+        try:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            from matplotlib.ticker import FuncFormatter
+        except ImportError:
+            tkinter.messagebox.showerror("Dashboard", "The dashboard needs matplotlib (pip install matplotlib).")
+            return
+        self.ledger = ledger
+        self.window = Toplevel(parent_window)
+        self.window.title("Spending Dashboard")
+
+        controls = Frame(self.window)
+        controls.pack(side=TOP, fill=X, padx=10, pady=5)
+        Label(controls, text="Group by:").pack(side=LEFT)
+        self.group = StringVar(value="Category")
+        OptionMenu(controls, self.group, "Category", "Account", command=lambda v: self.render()).pack(side=LEFT, padx=5)
+        Label(controls, text="Window:").pack(side=LEFT)
+        self.span_name = StringVar(value="1 year")
+        OptionMenu(controls, self.span_name, *self.SPANS, command=lambda v: self.reset_slider()).pack(side=LEFT, padx=5)
+
+        self.figure = Figure(figsize=(9, 6))
+        self.month_ax = self.figure.add_subplot(2, 1, 1)
+        self.day_ax = self.figure.add_subplot(2, 1, 2)
+        date_format = FuncFormatter(lambda x, pos: date.fromordinal(max(1, int(x))).strftime("%Y-%m"))
+        for ax in (self.month_ax, self.day_ax):
+            ax.xaxis.set_major_formatter(date_format)
+            ax.grid(True, alpha=0.3)
+        self.month_ax.set_ylabel("RM per month")
+        self.day_ax.set_ylabel("RM per day")
+        self.month_lines = {}  # name -> Line2D, created the first time a name appears
+        self.legend_names = []
+        self.day_line, = self.day_ax.plot([], [], color="tab:blue", linewidth=1)
+        self.figure.tight_layout()
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.window)
+        self.canvas.get_tk_widget().pack(side=TOP, fill=BOTH, expand=True)
+
+        # Pan slider: position is the first day shown
+        self.start = IntVar()
+        self.slider = Scale(self.window, orient=HORIZONTAL, showvalue=False, variable=self.start,
+                            command=lambda v: self.render())
+        self.slider.pack(side=TOP, fill=X, padx=10, pady=5)
+
+        self.redraw_after = None
+        self.latest = None  # slider position of the most recent window
+        self.ledger.subscribe(self.on_ledger_change)
+        self.window.bind("<Destroy>", lambda e: e.widget is self.window and self.ledger.unsubscribe(self.on_ledger_change))
+        self.reset_slider()
+
+    def update_slider_range(self):
+        # Slider covers the ledger's dates; returns (first, latest) start positions
+        span = self.ledger.trends.span()
+        days = self.SPANS[self.span_name.get()]
+        if span is None:
+            today = date.today().toordinal()
+            span = (today, today)
+        first, last = span
+        self.latest = max(first, last - days + 1)
+        self.slider.configure(from_=first, to=self.latest)
+        return first, self.latest
+
+    def reset_slider(self):
+        # On opening and on a new window size: start on the most recent window
+        first, latest = self.update_slider_range()
+        self.start.set(latest)
+        self.render()
+
+    def refresh(self):
+        # After a ledger change: stay where the user panned to, clamped to the new range.
+        # A view on the most recent window keeps following it.
+        following = self.start.get() >= self.latest
+        first, latest = self.update_slider_range()
+        self.start.set(latest if following else min(max(self.start.get(), first), latest))
+        self.render()
+
+    def on_ledger_change(self, event, detail):
+        if event == "budget":
+            return
+        # Several changes in a row redraw once
+        if self.redraw_after is not None:
+            self.window.after_cancel(self.redraw_after)
+        self.redraw_after = self.window.after(200, self.refresh)
+
+    def render(self):
+        self.redraw_after = None
+        start = self.start.get()
+        end = start + self.SPANS[self.span_name.get()] - 1
+        trends = self.ledger.trends
+
+        month_xs, series = trends.months(self.group.get().lower(), start, end)
+        for name, line in self.month_lines.items():
+            if name not in series:
+                line.set_data([], [])
+        for name, values in series.items():
+            if name not in self.month_lines:
+                self.month_lines[name], = self.month_ax.plot([], [], marker="o", markersize=3, label=name)
+            self.month_lines[name].set_data(month_xs, values)
+        # The legend only changes when the set of names shown does
+        if sorted(series) != self.legend_names:
+            self.legend_names = sorted(series)
+            self.month_ax.legend([self.month_lines[name] for name in self.legend_names], self.legend_names,
+                                 loc="upper left", fontsize="small")
+        self.month_ax.set_xlim(start, end)
+        self.month_ax.relim()
+        self.month_ax.autoscale_view(scalex=False)
+
+        day_xs, day_values = trends.daily(start, end, self.POINTS)
+        self.day_line.set_data(day_xs, day_values)
+        self.day_ax.set_xlim(start, end)
+        self.day_ax.relim()
+        self.day_ax.autoscale_view(scalex=False)
+
+        self.canvas.draw_idle()
+
+
+def iso_date(text):
+    # argparse type for --from/--to
+    try:
+        return datetime.strptime(text, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{text!r} is not a YYYY-MM-DD date")
+
+
+def main(argv=None):
+    # Command line entry point: opens the window, or prints summaries with --summary
+    parser = argparse.ArgumentParser(description="Expense Tracker. Opens the window unless --summary is given.")
+    parser.add_argument("--summary", action="store_true",
+                        help="print month/category totals and budget status instead of opening the window")
+    parser.add_argument("--year", type=int, default=datetime.now().year)
+    parser.add_argument("--month", type=int, choices=range(1, 13), metavar="MONTH",
+                        help="1-12; every month of --year when left out")
+    parser.add_argument("--from", dest="date_from", type=iso_date, metavar="YYYY-MM-DD",
+                        help="totals for a date range instead of by month (either end may be left open)")
+    parser.add_argument("--to", dest="date_to", type=iso_date, metavar="YYYY-MM-DD")
+    parser.add_argument("--category", help="only this category")
+    parser.add_argument("--file", default="expenses.txt", help="expense ledger (default: expenses.txt)")
+    parser.add_argument("--budgets", default="budgets.txt", help="budget file (default: budgets.txt)")
+    args = parser.parse_args(argv)
+    if not MINYEAR <= args.year <= MAXYEAR:
+        parser.error(f"--year must be between {MINYEAR} and {MAXYEAR}")
+    by_range = args.date_from is not None or args.date_to is not None
+    if by_range and not args.summary:
+        parser.error("--from/--to need --summary")
+    if by_range and args.date_from and args.date_to and args.date_from > args.date_to:
+        parser.error("--from is after --to")
+
+    if not args.summary:
+        ExpenseTracker(ledger=ExpenseLedger(args.file, args.budgets))
+        return 0
+
+    # A report only reads: no lock, no id rewrite, no snapshot
+    if not os.path.exists(args.file):
+        parser.error(f"no expense ledger at {args.file}")
+    ledger = ExpenseLedger(args.file, args.budgets, read_only=True)
+
+    if by_range:
+        start, end = args.date_from or date.min.isoformat(), args.date_to or date.max.isoformat()
+        rows = ledger.date_rows(start, end, args.category)
+        print(f"Expense Summary ({args.date_from or 'start'} to {args.date_to or 'end'}):")
+        for category, amount in sorted(ledger.category_totals(rows).items()):
+            print(f"  {category:<15} RM{amount:>10.2f}")
+        print(f"  {'Total':<15} RM{ledger.total(rows):>10.2f}")
+        return 0
+
+    for month in ([args.month] if args.month else range(1, 13)):
+        rows = ledger.filter_rows(args.year, month, args.category)
+        if not rows and args.month is None:
+            continue
+        print(f"Expense Summary ({month:02d}/{args.year}):")
+        for category, amount in sorted(ledger.category_totals(rows).items()):
+            print(f"  {category:<15} RM{amount:>10.2f}")
+        print(f"  {'Total':<15} RM{ledger.total(rows):>10.2f}")
+        status = ledger.budget_status(f"{args.year}-{month:02d}", args.category)
+        if status is None:
+            print("  No budget set")
+        else:
+            label, budget, remaining = status
+            if remaining >= 0:
+                print(f"  {label}: RM{budget:.2f} | Remaining: RM{remaining:.2f}")
+            else:
+                print(f"  {label}: RM{budget:.2f} | Over by RM{abs(remaining):.2f}")
+        print()
+    return 0
 
 
 if __name__ == "__main__":
-   app = ExpenseTracker()
\ No newline at end of file
+   sys.exit(main())
\ No newline at end of file
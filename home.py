@@ -5,7 +5,7 @@ from TRISHA import ExpenseTracker
 
 
 def open_pomodoro():
-    po()
+    po(root)
 
 def open_cgpa():
     new_win = tk.Toplevel(root)
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("matplotlib")
+
+from CHANSIMYEE import DEFAULT_GRADE_TO_GPA, CreditMatrix, calculate_gpa, grade_credits
+
+
+def random_records(rng, grade_to_gpa, count):
+    records, courses_of = {}, {}
+    for key in range(1, count + 1):
+        courses = [(rng.choice(list(grade_to_gpa)), rng.choice([1, 2, 3, 4, 1.5]))
+                   for _ in range(rng.randint(1, 12))]
+        records[str(key)] = {'name': f"Record {key}", 'gpa': 0.0, 'credits': grade_credits(courses)}
+        courses_of[str(key)] = courses
+    return records, courses_of
+
+
+def assert_matches_calculator(matrix, courses_of, grade_to_gpa):
+    gpas = matrix.gpas(grade_to_gpa)
+    assert set(gpas) == set(courses_of)
+    for key, courses in courses_of.items():
+        assert gpas[key] == pytest.approx(calculate_gpa(courses, grade_to_gpa), abs=1e-9)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_matrix_gpas_match_calculator(seed):
+    rng = random.Random(seed)
+    changed_scale = {grade: round(max(0.0, gpa - rng.random()), 2) for grade, gpa in DEFAULT_GRADE_TO_GPA.items()}
+    records, courses_of = random_records(rng, DEFAULT_GRADE_TO_GPA, 500)
+    matrix = CreditMatrix(records)
+    assert_matches_calculator(matrix, courses_of, DEFAULT_GRADE_TO_GPA)
+    assert_matches_calculator(matrix, courses_of, changed_scale)
+
+
+def test_patched_matrix_matches_calculator():
+    rng = random.Random(2)
+    records, courses_of = random_records(rng, DEFAULT_GRADE_TO_GPA, 50)
+    matrix = CreditMatrix(records)
+    for key in ("3", "50", "17"):
+        matrix.remove(key)
+        del courses_of[key]
+    matrix.remove("999")  # unknown keys are ignored
+    courses_of["51"] = [("A", 3), ("C", 2)]
+    courses_of["7"] = [("B+", 4)]
+    courses_of["52"] = [("P", 2), ("A", 1)]  # a grade no record had before
+    for key in ("51", "7", "52"):
+        matrix.set(key, grade_credits(courses_of[key]))
+    scale = dict(DEFAULT_GRADE_TO_GPA, P=3.5)
+    assert_matches_calculator(matrix, courses_of, scale)
+
+
+def test_grades_missing_from_scale_are_not_counted():
+    matrix = CreditMatrix({'1': {'name': "x", 'gpa': 0.0, 'credits': {'A': 3, 'Z': 3}},
+                           '2': {'name': "y", 'gpa': 0.0, 'credits': {'Z': 2}}})
+    assert matrix.gpas(DEFAULT_GRADE_TO_GPA) == {'1': 4.0, '2': 0.0}